@@ -1,48 +1,426 @@
 import os
-import glob
+import logging
+import threading
+from functools import partial
+import numpy as np
 import streamlit as st
-import geopandas as gpd
 import folium
 from folium.features import GeoJsonTooltip
+from folium.plugins import VectorGridProtobuf
 from streamlit_folium import st_folium
-import branca.colormap as cm
 from PIL import Image
+from geometry_levels import LEVELS, level_for_scope, level_for_zoom, level_geometries
+from intersections import (
+    EMPTY_ROWS, apportioned_totals, build_apportionment, build_location_index, location_mask, pack_index,
+    unpack_index,
+)
+from map_layers import (
+    DIVERGING_RGB, SELECTED_STYLE, CentroidLayer, RampLegend, ScriptDependencies, TopoGeoJson, candidate_style,
+    centroid_features, geojson_layer, layer_payload, location_style, ramp_colors, raster_layer, village_style,
+    village_tile_layer,
+)
+from exports import DISTRICT_COLUMNS, csv_bytes, polygon_file_name, polygon_villages, polygons_zip
+from catchments import MAX_RADIUS_KM, METHODS, build_catchments, rank_candidates, read_candidates, score_points
+from siting import DEFAULT_K, DEFAULT_RADIUS_KM, existing_sites, propose_sites
+from season_change import MATCH_GEOMETRY, MATCH_KEY, season_change
+from summary import build_summary, frame_stats
+from catalog import (
+    dataset_key, dataset_slug, districts, find_dataset, load_catalog, partition_summary, season_label, seasons,
+)
+from shared_cache import SharedCache, scoped_name, version_key
+from layers import LEVEL_COLUMNS, SUGGESTED_MAX_ID, VILLAGES_SHP, LayerStore, layer_version, source_version
+from vector_tiles import MAX_ZOOM, TILE_DIR, TILE_LAYER, TILE_URL, read_tile_metadata, tiles_are_current
+from viewport import map_view, tile_rows, viewport_tiles
+from village_lookup import ClickLookup, VillageSearch
+from raster_choropleth import render_choropleth
+from warmup import Warmup
+from instrumentation import (
+    add_bytes, cache_miss, finish_rerun, serve_metrics, stage, start_rerun,
+)
 st.set_page_config(layout="wide")
 
 # ----------------------------
-# Helpers for paths & caching
+# Instrumentation
 # ----------------------------
-def shapefile_mtime_key(shp_path: str) -> float:
-    stem = os.path.splitext(shp_path)[0]
-    sidecars = glob.glob(stem + ".*")
-    if not sidecars:
-        return 0.0
-    return max(os.path.getmtime(f) for f in sidecars)
+# Every rerun's stage timings go to the process metrics and to the
+# instrumentation log; with ?debug=1 they are also shown in the sidebar.
+profile = start_rerun()
+
+# Threads warming the caches, leaving the other cores to user reruns
+WARMUP_WORKERS = 2
+
+# Precomputes the default dataset's views in the background (see below)
+@st.cache_resource
+def warmup():
+    # Cached calls made from its threads would each log a missing-ScriptRunContext warning
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        lambda record: not threading.current_thread().name.startswith("warmup")
+    )
+    return Warmup(max_workers=WARMUP_WORKERS)
+
+# Metrics and readiness are per worker, so each worker serves its own: with
+# CASTOR_METRICS_PORT_OFFSET on its Streamlit port plus the offset (the worker
+# on :8501 answers /ready on :8501 + offset), or on CASTOR_METRICS_PORT when
+# that is set per worker. A port already taken is an error rather than
+# another worker's status served in its place.
+def metrics_port():
+    port = os.environ.get("CASTOR_METRICS_PORT")
+    if port:
+        return int(port)
+    offset = os.environ.get("CASTOR_METRICS_PORT_OFFSET")
+    if offset:
+        return int(st.get_option("server.port")) + int(offset)
+    return None
+
+# When a metrics port is set, serves the metrics for a Prometheus scraper and
+# the readiness check (/ready) for a load balancer, on CASTOR_METRICS_HOST
+# (default: local only).
+@st.cache_resource
+def instrument_process():
+    port = metrics_port()
+    host = os.environ.get("CASTOR_METRICS_HOST", "127.0.0.1")
+    return serve_metrics(port, host, status=warmup().status) if port else None
+
+instrument_process()
 
 # ----------------------------
 # Load shapefiles
 # ----------------------------
-@st.cache_data
-def load_villages():
-    gdf = gpd.read_file(r"shp/castor_village_level_acreage_ha_new_int.shp")
-    gdf = gdf.to_crs(epsg=4326)
-    return gdf
+# District/season partitions (catalog.json), read once per process
+@st.cache_resource
+def data_catalog():
+    return load_catalog()
+
+# One store per process: layers are re-read only when their sidecar mtimes
+# change, in the background, while the previous version keeps serving.
+# Partitions beyond the memory budget are dropped, least recently used first,
+# together with the cached resources built from them (release_layer_caches).
+@st.cache_resource
+def layer_store():
+    return LayerStore(
+        memory_budget=int(data_catalog()["memory_budget_mb"] * 2**20),
+        on_evict=lambda path: release_layer_caches(path),
+    )
+
+# Data versions that cached resources were built for -> their dataset entry
+@st.cache_resource
+def data_versions():
+    return {}
+
+def partition_version(dataset, villages_version, locations_version):
+    data_version = (dataset_key(dataset), villages_version, locations_version)
+    data_versions()[data_version] = dataset
+    return data_version
+
+# Join results and exports, computed once per host and read back by every worker
+@st.cache_resource
+def shared_cache():
+    return SharedCache()
+
+def load_layer(path):
+    store = layer_store()
+    if path not in store.versions():
+        cache_miss()
+    return store.get(path)
+
+def load_villages(dataset):
+    return load_layer(dataset["villages"])
+
+def load_location_polygons(dataset):
+    return load_layer(dataset["locations"])
+
+def load_candidate_points(dataset):
+    return load_layer(dataset["points"])
+
+# Attribute-only summary of any partition, without loading its geometries
+@st.cache_data(max_entries=64)
+def load_partition_summary(key, versions, _dataset):
+    return partition_summary(_dataset)
+
+@st.cache_data(max_entries=4)
+def load_uploaded_candidates(name, data):
+    return read_candidates(name, data)
+
+# Village/candidate pairs within the largest radius; a radius sweep only re-scores
+@st.cache_data(max_entries=4)
+def load_catchments(data_version, candidates_key, _gdf, _points):
+    cache_miss()
+    return build_catchments(_gdf, _points)
+
+# location id -> village rows, rebuilt only when either layer changes on disk.
+# Held as read-only views of the memory-mapped arrays, so not copied per rerun.
+@st.cache_resource(max_entries=4)
+def load_location_index(data_version, _gdf, _loc_gdf):
+    cache_miss()
+    arrays = shared_cache().arrays(
+        scoped_name("location_index", data_version[0]), version_key(data_version), lambda: pack_index(build_location_index(_gdf, _loc_gdf))
+    )
+    return unpack_index(arrays)
+
+# location id -> (village rows, area fractions) and apportioned castor ha per id
+@st.cache_resource(max_entries=4)
+def load_apportionment(data_version, _gdf, _loc_gdf):
+    cache_miss()
+    arrays = shared_cache().arrays(
+        scoped_name("apportionment", data_version[0]), version_key(data_version), lambda: pack_index(build_apportionment(_gdf, _loc_gdf))
+    )
+    apportionment = unpack_index(arrays)
+    return apportionment, apportioned_totals(apportionment, _gdf["castor_ha"])
+
+# Previous-season values aligned to the villages, once per season pair
+@st.cache_data(max_entries=4)
+def load_season_change(data_version, previous_version, _gdf, _previous):
+    cache_miss()
+    return season_change(_gdf, _previous)
+
+# Click and name lookups over the villages, once per data version
+@st.cache_resource(max_entries=4)
+def load_village_lookup(data_version, _gdf):
+    cache_miss()
+    return ClickLookup(_gdf), VillageSearch(_gdf["VILLAGE"], _gdf["TEHSIL"])
+
+# Filter options, bounds, centres and castor_ha aggregates, once per data version
+@st.cache_data(max_entries=4)
+def load_summary(data_version, _gdf, _loc_gdf):
+    cache_miss()
+    return build_summary(_gdf, _loc_gdf)
+
+# New sites for a K and radius, reproducible per data version
+@st.cache_data(max_entries=16)
+def load_proposed_sites(data_version, k, radius_km, _gdf, _loc_gdf):
+    cache_miss()
+    return propose_sites(_gdf, existing_sites(_loc_gdf), k, radius_km)
+
+# Villages intersecting one XYZ tile, for viewport culling. Read-only and
+# shared, like gdf.sindex which answers the query.
+@st.cache_resource(max_entries=4096)
+def load_tile_rows(data_version, tile, _gdf):
+    cache_miss()
+    return tile_rows(_gdf, *tile)
 
-@st.cache_data
-def load_location_polygons():
-    gdf_loc = gpd.read_file("shp/polygons.shp")
-    gdf_loc = gdf_loc.to_crs(epsg=4326)
-    return gdf_loc
+# ----------------------------
+# Cached map layers
+# ----------------------------
+# Only these properties are serialized into the page
+VILLAGE_PROPERTIES = ["VILLAGE", "TEHSIL", "castor_ha", "geometry"]
+LOCATION_PROPERTIES = ["id", "acreage", "geometry"]
+CHANGE_PROPERTIES = ["castor_ha_prev", "change_ha", "change_pct"]
+# Candidate sites whose catchment circle is drawn
+TOP_CATCHMENTS = 10
+# Widget key of the map; the view it last reported drives viewport culling
+MAP_KEY = "village_map"
+# Raster mode burns villages in at this simplification level, and draws them
+# as vectors from the zoom where the image would look blocky
+RASTER_LEVEL = "tehsil"
+RASTER_MAX_ZOOM = LEVELS[RASTER_LEVEL]["zoom"]
+
+# Serialized layers keyed by data version and filter state; shared read-only
+# between reruns and sessions, so a repeated filter costs no re-serialization.
+# With a season comparison (``compare_key``) villages are coloured by change;
+# ``tiles`` are the viewport tiles the villages were culled to.
+@st.cache_resource(max_entries=32)
+def village_layer_payload(data_version, tehsil, location_ids, level, encoding, _filtered_gdf, vmin, vmax,
+                          compare_key=None, _change=None, tiles=None):
+    cache_miss()
+    layer = level_geometries(_filtered_gdf[VILLAGE_PROPERTIES + LEVEL_COLUMNS], level)
+    if compare_key is None:
+        layer["fill"] = ramp_colors(layer["castor_ha"], vmin, vmax)
+    else:
+        layer = layer.join(_change[CHANGE_PROPERTIES].round(2))
+        layer["fill"] = ramp_colors(layer["change_ha"], vmin, vmax, stops=DIVERGING_RGB)
+    return layer_payload(layer, encoding)
+
+# Choropleth image of the district's filtered villages, per data version,
+# location filter and colour scale; it needs no per-zoom or per-view variants
+@st.cache_resource(max_entries=8)
+def village_raster(data_version, location_ids, _filtered_gdf, vmin, vmax, compare_key=None, _change=None):
+    cache_miss()
+    layer = level_geometries(_filtered_gdf[VILLAGE_PROPERTIES + LEVEL_COLUMNS], RASTER_LEVEL)
+    if compare_key is None:
+        fill = ramp_colors(layer["castor_ha"], vmin, vmax)
+    else:
+        fill = ramp_colors(_change.loc[layer.index, "change_ha"], vmin, vmax, stops=DIVERGING_RGB)
+    return render_choropleth(layer, fill)
+
+@st.cache_resource(max_entries=32)
+def location_layer_payload(data_version, kind, location_ids, encoding, _locations, _castor_totals):
+    cache_miss()
+    layer = _locations[LOCATION_PROPERTIES].copy()
+    layer["castor_ha"] = layer["id"].map(_castor_totals).round(2)
+    return layer_payload(layer, encoding)
+
+@st.cache_resource(max_entries=32)
+def location_centroid_payload(data_version, location_ids, show_existing, show_suggested, _locations):
+    cache_miss()
+    suggested = (_locations["id"] <= SUGGESTED_MAX_ID).to_numpy()
+    shown = (suggested & show_suggested) | (~suggested & show_existing)
+    return centroid_features(_locations[shown], np.where(suggested[shown], "red", "blue"))
 
-# ============================
-# App title
-# ============================
+# ----------------------------
+# Shared exports
+# ----------------------------
+# Generated on the first click on any worker of the host, then read back from
+# the shared cache on each download rather than kept in memory. Entries are
+# named per dataset (the first part of the data version).
+def shared_export(kind, name, data_version, key, build):
+    def timed_build():
+        with stage(f"export_{kind}"):
+            data = build()
+            add_bytes(len(data))
+        return data
+    return shared_cache().blob(scoped_name(name, data_version[0]), key, timed_build)
+
+def district_csv(data_version, gdf):
+    return shared_export(
+        "district", "district_csv", data_version, version_key(data_version),
+        lambda: csv_bytes(gdf[DISTRICT_COLUMNS]),
+    )
+
+def polygon_csv(data_version, pid, gdf, apportionment):
+    return shared_export(
+        "polygon", f"polygon_{pid}_csv", data_version, version_key(data_version),
+        lambda: csv_bytes(polygon_villages(gdf, *apportionment[pid])),
+    )
+
+def polygons_zip_bytes(data_version, location_ids, gdf, apportionment):
+    return shared_export(
+        "zip", "polygons_zip", data_version, version_key(data_version, location_ids),
+        lambda: polygons_zip(gdf, apportionment, location_ids),
+    )
+
+# When the store evicts a layer, the resources keyed by a data version alone
+# that were built from it (geometries in the click lookup, the per-partition
+# index arrays) are dropped, and the warm-up forgets that version so it is
+# warmed again. Serialized layers, images and tile rows hold no geometries
+# and age out under their max_entries, like the pickled cache_data entries.
+def release_layer_caches(path):
+    for data_version, dataset in list(data_versions().items()):
+        if path not in (dataset["villages"], dataset["locations"]):
+            continue
+        data_versions().pop(data_version, None)
+        load_location_index.clear(data_version, None, None)
+        load_apportionment.clear(data_version, None, None)
+        load_village_lookup.clear(data_version, None)
+        warmup().reset(data_version)
+
+# ----------------------------
+# Background warm-up
+# ----------------------------
+# A fresh worker, or one whose layers just changed on disk, builds what the
+# default views need before anyone asks: the district map, each tehsil's view
+# and the per-location village exports, under the same data-version keys as
+# the script uses. The watch thread compares the layer versions on disk,
+# without touching the layer store, so it picks up changed files with no
+# session open and does not keep the default partition from being evicted;
+# only a plan loads it. The first run of the script starts it; enabling
+# server.scriptHealthCheckEnabled lets a startup probe do that.
+def default_data_version():
+    dataset = data_catalog()["datasets"][0]
+    return (dataset_key(dataset), layer_version(dataset["villages"]), layer_version(dataset["locations"]))
+
+def warmup_plan(data_version):
+    dataset = data_catalog()["datasets"][0]
+    gdf, villages_version = load_villages(dataset)
+    loc_gdf, locations_version = load_location_polygons(dataset)
+    if partition_version(dataset, villages_version, locations_version) != data_version:
+        # The store is still reading the new files; retried on the next check
+        raise RuntimeError("layers changed during warm-up")
+    location_index = load_location_index(data_version, gdf, loc_gdf)
+    apportionment, castor_totals = load_apportionment(data_version, gdf, loc_gdf)
+    summary = load_summary(data_version, gdf, loc_gdf)
+    load_village_lookup(data_version, gdf)
+
+    # Default filter state: TopoJSON, all locations shown, no season comparison.
+    # Cached calls mirror the script's exactly: keys cover the arguments passed.
+    encoding = "TopoJSON"
+    location_ids = tuple(summary["location_ids"])
+    tehsils = gdf["TEHSIL"].to_numpy()
+
+    def district_map():
+        scope = summary["scopes"]["All"]
+        village_layer_payload(
+            data_version, "All", None, level_for_scope("All"), encoding, gdf,
+            scope["castor_ha_min"], scope["castor_ha_max"], compare_key=None, _change=None, tiles=None,
+        )
+        suggested = loc_gdf["id"] <= SUGGESTED_MAX_ID
+        for kind, rows in (("existing", ~suggested), ("suggested", suggested)):
+            location_layer_payload(data_version, kind, location_ids, encoding, loc_gdf[rows], castor_totals)
+        location_centroid_payload(data_version, location_ids, True, True, loc_gdf)
+        district_csv(data_version, gdf)
+
+    def tehsil_view(tehsil):
+        scope = summary["scopes"][tehsil]
+        village_layer_payload(
+            data_version, tehsil, None, level_for_scope(tehsil), encoding, gdf[tehsils == tehsil],
+            scope["castor_ha_min"], scope["castor_ha_max"], compare_key=None, _change=None, tiles=None,
+        )
+
+    export_ids = [pid for pid in location_ids if len(location_index.get(pid, EMPTY_ROWS))]
 
+    def location_villages():
+        for pid in export_ids:
+            polygon_csv(data_version, pid, gdf, apportionment)
+        if len(export_ids) > 1:
+            polygons_zip_bytes(data_version, tuple(export_ids), gdf, apportionment)
 
-st.title("🌱 BANAS KANTHA District - Castor Crop Acreage Dashboard")
+    return [
+        ("district/map", district_map),
+        *((f"tehsil/{tehsil}", partial(tehsil_view, tehsil)) for tehsil in summary["tehsils"]),
+        ("locations/villages", location_villages),
+    ]
 
-gdf = load_villages()
-loc_gdf = load_location_polygons()
+warmup().watch(default_data_version, warmup_plan)
+
+# ============================
+# Dataset selection
+# ============================
+catalog = data_catalog()
+if len(catalog["datasets"]) > 1:
+    st.sidebar.title("Dataset")
+    selected_district = st.sidebar.selectbox("District", districts(catalog))
+    selected_season = st.sidebar.selectbox(
+        "Season", seasons(catalog, selected_district), format_func=season_label
+    )
+    dataset = find_dataset(catalog, selected_district, selected_season)
+
+    # Every partition's totals, from attributes only
+    with st.sidebar.expander("All Datasets"):
+        loaded = layer_store().versions()
+        overview = []
+        for entry in catalog["datasets"]:
+            versions = (layer_version(entry["villages"]), layer_version(entry["locations"]))
+            scope = load_partition_summary(dataset_key(entry), versions, entry)["scopes"]["All"]
+            overview.append({
+                "District": entry["district"],
+                "Season": season_label(entry["season"]),
+                "Villages": scope["count"],
+                "Castor Area (ha)": scope["castor_ha_sum"],
+                "Loaded": entry["villages"] in loaded,
+            })
+        st.dataframe(
+            overview,
+            hide_index=True,
+            column_config={"Castor Area (ha)": st.column_config.NumberColumn(format="%.2f")},
+        )
+else:
+    dataset = catalog["datasets"][0]
+
+title = f"🌱 {dataset['district'].upper()} District - Castor Crop Acreage Dashboard"
+st.title(title + (f" ({dataset['season']})" if dataset["season"] else ""))
+
+with stage("load_villages", cache="hit"):
+    gdf, villages_version = load_villages(dataset)
+with stage("load_location_polygons", cache="hit"):
+    loc_gdf, locations_version = load_location_polygons(dataset)
+data_version = partition_version(dataset, villages_version, locations_version)
+with stage("spatial_join", cache="hit"):
+    location_index = load_location_index(data_version, gdf, loc_gdf)
+with stage("apportionment", cache="hit"):
+    apportionment, castor_totals = load_apportionment(data_version, gdf, loc_gdf)
+with stage("summary", cache="hit"):
+    summary = load_summary(data_version, gdf, loc_gdf)
+with stage("village_lookup", cache="hit"):
+    click_lookup, village_search = load_village_lookup(data_version, gdf)
 
 # ============================
 # Sidebar filters
@@ -50,27 +428,56 @@ loc_gdf = load_location_polygons()
 st.sidebar.title("Filters")
 
 # Tehsil filter
-tehsils = ["All"] + sorted(gdf["TEHSIL"].dropna().unique().tolist())
+tehsils = ["All"] + summary["tehsils"]
 selected_tehsil = st.sidebar.selectbox("Select Tehsil", tehsils, index=0)
 
-# Village filter
-if selected_tehsil != "All":
-    villages = gdf.loc[gdf["TEHSIL"] == selected_tehsil, "VILLAGE"].dropna().unique().tolist()
+# Village filter: type-ahead search, or the tehsil's villages
+village_query = st.sidebar.text_input(
+    "Search Village", placeholder=f"Type to search {summary['scopes']['All']['count']:,} villages"
+)
+if village_query:
+    matches = village_search.search(village_query, tehsil=None if selected_tehsil == "All" else selected_tehsil)
+    villages = ["All"] + matches
+elif selected_tehsil != "All":
+    villages = ["All"] + summary["villages"].get(selected_tehsil, [])
 else:
-    villages = gdf["VILLAGE"].dropna().unique().tolist()
-villages = ["All"] + sorted(villages)
-selected_village = st.sidebar.selectbox("Select Village", villages, index=0)
+    villages = ["All"]
+selected_village = st.sidebar.selectbox(
+    "Select Village", villages, index=1 if village_query and len(villages) > 1 else 0
+)
+if village_query and len(villages) == 1:
+    st.sidebar.caption("No matching village")
 
 # Polygon filter
-all_ids = sorted([int(i) for i in loc_gdf["id"].unique().tolist()])
+all_ids = summary["location_ids"]
 selected_raw = st.sidebar.multiselect("Select Suggested Location IDs", ["All"] + all_ids, default="All")
 if "All" in selected_raw:
-    selected_ids = all_ids
+    selected_ids = list(all_ids)
 else:
     selected_ids = [int(i) for i in selected_raw]
 
 filtered_polygons = loc_gdf[loc_gdf["id"].isin(selected_ids)]
 
+# Per-tehsil totals
+with st.sidebar.expander("Tehsil Totals"):
+    st.dataframe(
+        summary["tehsil_totals"],
+        hide_index=True,
+        column_config={"Castor Area (ha)": st.column_config.NumberColumn(format="%.2f")},
+    )
+
+# Castor inside each selected location, villages weighted by their area share
+with st.sidebar.expander("Location Castor Totals"):
+    st.dataframe(
+        {
+            "Location ID": selected_ids,
+            "Villages": [len(location_index.get(pid, EMPTY_ROWS)) for pid in selected_ids],
+            "Castor Inside (ha)": [castor_totals.get(pid, 0.0) for pid in selected_ids],
+        },
+        hide_index=True,
+        column_config={"Castor Inside (ha)": st.column_config.NumberColumn(format="%.2f")},
+    )
+
 # ============================
 # Polygon Layer Toggles
 # ============================
@@ -79,132 +486,374 @@ show_existing = st.sidebar.checkbox("Show Existing Locations (Blue)", value=True
 show_suggested = st.sidebar.checkbox("Show Suggested Locations (Red)", value=True)
 
 # ============================
-# Data filtering
+# Candidate site scoring
 # ============================
-filtered_gdf = gdf.copy()
-if selected_tehsil != "All":
-    filtered_gdf = filtered_gdf[filtered_gdf["TEHSIL"] == selected_tehsil]
+st.sidebar.subheader("Candidate Sites")
+candidates = None
+if st.sidebar.checkbox("Score candidate sites", value=False):
+    site_sources = (["Suggested points"] if dataset["points"] else []) + ["Upload"]
+    site_source = st.sidebar.radio("Candidates", site_sources, horizontal=True)
+    if site_source == "Upload":
+        upload = st.sidebar.file_uploader(
+            "Candidate points",
+            type=["csv", "geojson", "json", "gpkg", "zip"],
+            help="CSV with lon/lat columns, GeoJSON/GeoPackage, or a zipped shapefile.",
+        )
+        if upload is not None:
+            try:
+                candidates = load_uploaded_candidates(upload.name, upload.getvalue())
+                candidates_key = ("upload", upload.file_id)
+            except Exception as exc:
+                st.sidebar.error(f"Could not read {upload.name}: {exc}")
+    else:
+        candidates, points_version = load_candidate_points(dataset)
+        candidates_key = ("points", points_version)
+    radius_km = st.sidebar.slider("Catchment radius (km)", 1.0, float(MAX_RADIUS_KM), 10.0, 0.5)
+    catchment_rule = st.sidebar.radio("Catchment rule", list(METHODS), format_func=METHODS.get)
+
+ranked = None
+if candidates is not None and not candidates.empty:
+    with stage("candidate_scoring", cache="hit"):
+        catchments = load_catchments(data_version, candidates_key, gdf, candidates)
+        site_ha, site_villages = score_points(catchments, gdf["castor_ha"], radius_km, catchment_rule)
+        ranked = rank_candidates(candidates, site_ha, site_villages)
 
-# Villages touching polygons
-if not filtered_polygons.empty and "All" not in selected_raw:
-    filtered_gdf = gpd.sjoin(filtered_gdf, filtered_polygons, predicate="intersects")
-    filtered_gdf = filtered_gdf.drop_duplicates(subset="VILLAGE")
-    filtered_gdf = filtered_gdf.drop(columns=["index_right"], errors="ignore")
+# ============================
+# Site optimizer
+# ============================
+st.sidebar.subheader("Site Optimizer")
+proposed = None
+if st.sidebar.checkbox("Propose new collection centres", value=False):
+    k_sites = st.sidebar.number_input("Number of new sites", min_value=1, max_value=100, value=DEFAULT_K)
+    cover_km = st.sidebar.slider("Coverage radius (km)", 1.0, 25.0, DEFAULT_RADIUS_KM, 0.5)
+    with stage("site_optimizer", cache="hit"):
+        proposed = load_proposed_sites(data_version, int(k_sites), cover_km, gdf, loc_gdf)
+
+# ============================
+# Season comparison
+# ============================
+other_seasons = [
+    entry for entry in catalog["datasets"]
+    if entry["district"] == dataset["district"] and entry is not dataset
+]
+change = None
+if other_seasons:
+    st.sidebar.subheader("Season Comparison")
+    compare_to = st.sidebar.selectbox(
+        "Compare with season",
+        [None] + other_seasons,
+        format_func=lambda entry: "No comparison" if entry is None else season_label(entry["season"]),
+    )
+    if compare_to is not None:
+        with stage("load_previous_villages", cache="hit"):
+            previous_gdf, previous_version = load_villages(compare_to)
+        compare_key = (dataset_key(compare_to), previous_version)
+        with stage("season_change", cache="hit"):
+            change = load_season_change(data_version, compare_key, gdf, previous_gdf)
+        matched = change["match"].value_counts()
+        prev_total = float(np.nansum(change["castor_ha_prev"]))
+        curr_total = float(np.nansum(gdf["castor_ha"]))
+        st.sidebar.metric(
+            "Castor Area (ha)",
+            f"{curr_total:,.0f}",
+            delta=f"{curr_total - prev_total:+,.0f} vs {season_label(compare_to['season'])}",
+        )
+        st.sidebar.caption(
+            f"Villages matched by key: {matched.get(MATCH_KEY, 0)}, "
+            f"by location: {matched.get(MATCH_GEOMETRY, 0)}, "
+            f"unmatched: {len(change) - int(matched.sum())}"
+        )
+
+# ============================
+# Map Options
+# ============================
+st.sidebar.subheader("Map Options")
+map_encoding = st.sidebar.radio(
+    "Map data encoding",
+    ["TopoJSON", "GeoJSON"],
+    help="TopoJSON stores shared village boundaries once on a quantized grid, for a much smaller page.",
+)
+# Vector tiles are offered once `python vector_tiles.py` has generated them
+# from the current village shapefile (recompiling it leaves them valid), with
+# the attributes the filters read. The tile set is built from the default
+# village layer only and styled by castor area, so it is not offered while
+# comparing seasons
+tile_metadata = read_tile_metadata(TILE_DIR)
+tiles_built = change is None and dataset["villages"] == VILLAGES_SHP and bool(tile_metadata)
+tiles_stale = tiles_built and not tiles_are_current(tile_metadata, source_version(VILLAGES_SHP))
+tiles_available = tiles_built and not tiles_stale
+village_render = st.sidebar.radio(
+    "Village layer",
+    ["Embedded", "Viewport", "Raster"] + (["Vector tiles"] if tiles_available else []),
+    help=(
+        "Viewport sends only the villages in view, at the detail of the zoom level. "
+        "Raster sends the whole district as one image, switching to the villages in view "
+        "when zoomed in or when a tehsil is selected. "
+        "Vector tiles fetch only the visible part of the village layer from the local tile set."
+    ),
+)
+if tiles_stale:
+    st.sidebar.caption("Vector tiles are out of date; rebuild them with `python vector_tiles.py`.")
+
+# ============================
+# Data filtering
+# ============================
+with stage("filter"):
+    village_mask = np.ones(len(gdf), dtype=bool)
+    if selected_tehsil != "All":
+        village_mask &= (gdf["TEHSIL"] == selected_tehsil).to_numpy()
+
+    # Villages touching polygons
+    location_filter = not filtered_polygons.empty and "All" not in selected_raw
+    if location_filter:
+        village_mask &= location_mask(location_index, selected_ids, len(gdf))
+
+    filtered_gdf = gdf[village_mask]
+
+    # Rows of the selected village within the filters, from the name index
+    selected_positions = EMPTY_ROWS
+    if selected_village != "All":
+        named = village_search.positions(selected_village)
+        selected_positions = named[village_mask[named]]
+
+# Viewport culling: only the filtered villages in the tiles around the last
+# map view are drawn; before the map reports a view, the filter scope is used.
+# Raster mode covers whole-district views with an image and culls the vector
+# villages the same way once zoomed in past it.
+view_tiles = None
+shown_gdf = filtered_gdf
+raster_view = village_render == "Raster" and selected_tehsil == "All"
+if village_render == "Viewport" or raster_view:
+    with stage("viewport", cache="hit"):
+        view = map_view(st.session_state.get(MAP_KEY))
+        scope_bounds = summary["scopes"][selected_tehsil]["bounds"] or summary["scopes"]["All"]["bounds"]
+        if view is None and scope_bounds:
+            view = scope_bounds, 9
+        if view is not None:
+            view_bounds, view_zoom = view
+            view_tiles = viewport_tiles(view_bounds, view_zoom)
+            in_view = np.zeros(len(gdf), dtype=bool)
+            for tile in view_tiles:
+                in_view[load_tile_rows(data_version, tile, gdf)] = True
+            shown_gdf = gdf[village_mask & in_view]
+        if raster_view and (view_tiles is None or view_zoom <= RASTER_MAX_ZOOM):
+            shown_gdf = filtered_gdf.iloc[:0]
 
 # ============================
 # Map setup
 # ============================
-if filtered_gdf.empty:
-    map_center = [gdf.geometry.centroid.y.mean(), gdf.geometry.centroid.x.mean()]
+# The base map renders to the same script on every rerun, so the browser keeps
+# it (tiles, pan and zoom) and only swaps the feature groups built below.
+# Centre and colour range come from the summary unless a location filter
+# narrows the villages below a whole tehsil.
+map_build = stage("map_build").start()
+scope_stats = frame_stats(filtered_gdf) if location_filter else summary["scopes"][selected_tehsil]
+district_center = summary["scopes"]["All"]["center"] or [0.0, 0.0]
+map_center = scope_stats["center"] or district_center
+
+m = folium.Map(location=district_center, zoom_start=9, tiles="CartoDB positron")
+ScriptDependencies(TopoGeoJson, CentroidLayer, *([VectorGridProtobuf] if tiles_available else [])).add_to(m)
+village_group = folium.FeatureGroup(name="Villages")
+location_group = folium.FeatureGroup(name="Locations")
+selection_group = folium.FeatureGroup(name="Selected Village")
+candidate_group = folium.FeatureGroup(name="Candidate Sites")
+proposal_group = folium.FeatureGroup(name="Proposed Sites")
+
+# Color scale for castor_ha, or a diverging scale centred on no change
+if change is None:
+    min_val, max_val = scope_stats["castor_ha_min"], scope_stats["castor_ha_max"]
+    RampLegend(
+        min_val, max_val, caption=f"Castor Area (ha) | Min: {min_val:.2f} | Max: {max_val:.2f}"
+    ).add_to(village_group)
 else:
-    map_center = [filtered_gdf.geometry.centroid.y.mean(), filtered_gdf.geometry.centroid.x.mean()]
-
-m = folium.Map(location=map_center, zoom_start=9, tiles="CartoDB positron")
-
-# Color scale for castor_ha
-ha_series = filtered_gdf["castor_ha"].dropna()
-min_val, max_val = (0, 1) if ha_series.empty else (float(ha_series.min()), float(ha_series.max()))
-colormap = cm.LinearColormap(colors=["yellow", "darkgreen"], vmin=min_val, vmax=max_val)
-colormap.caption = f"Castor Area (ha) | Min: {min_val:.2f} | Max: {max_val:.2f}"
-colormap.add_to(m)
-
-# Village style
-def style_function(feature):
-    village_name = feature["properties"].get("VILLAGE")
-    ha_value = feature["properties"].get("castor_ha")
-    if selected_village != "All" and village_name == selected_village:
-        return {"fillColor": "blue", "color": "black", "weight": 3, "fillOpacity": 0.8}
+    max_val = float(np.nanmax(np.abs(change.loc[filtered_gdf.index, "change_ha"]), initial=0.0)) or 1.0
+    min_val = -max_val
+    RampLegend(
+        min_val, max_val, caption=f"Change in Castor Area (ha) vs {season_label(compare_to['season'])}",
+        stops=DIVERGING_RGB,
+    ).add_to(village_group)
+
+village_tooltip_args = dict(
+    fields=["VILLAGE", "TEHSIL", "castor_ha"],
+    aliases=["Village:", "Tehsil:", "Castor (ha):"],
+    localize=True,
+)
+if change is not None:
+    village_tooltip_args["fields"] += CHANGE_PROPERTIES
+    village_tooltip_args["aliases"] += ["Previous (ha):", "Change (ha):", "Change (%):"]
+location_filter_key = tuple(selected_ids) if location_filter else None
+
+# District raster under any vector villages drawn on top of it. Villages in
+# the image have no tooltips; a click still resolves them server-side.
+if raster_view and not filtered_gdf.empty:
+    with stage("village_raster", cache="hit"):
+        raster_png, raster_bounds = village_raster(
+            data_version, location_filter_key, filtered_gdf, min_val, max_val,
+            compare_key=None if change is None else compare_key, _change=change,
+        )
+        add_bytes(len(raster_png))
+    raster_layer(raster_png, raster_bounds, name="Villages").add_to(village_group)
+
+if village_render == "Vector tiles":
+    base_path = st.get_option("server.baseUrlPath").strip("/")
+    village_tile_layer(
+        "/" + "/".join(p for p in [base_path, TILE_URL] if p),
+        TILE_LAYER,
+        max_zoom=int(tile_metadata.get("maxzoom", MAX_ZOOM)),
+        vmin=min_val,
+        vmax=max_val,
+        tehsil=None if selected_tehsil == "All" else selected_tehsil,
+        allowed_ids=filtered_gdf["OBJECTID"] if location_filter else None,
+    ).add_to(village_group)
+elif not shown_gdf.empty:
+    # Ship geometry simplified for the filter scope (or the viewport zoom),
+    # serialized once per filter state and viewport tiles
+    if view_tiles is not None:
+        detail_level = level_for_zoom(view_zoom)
     else:
-        return {
-            "fillColor": colormap(ha_value) if ha_value is not None else "grey",
-            "color": "black",
-            "weight": 1,
-            "fillOpacity": 0.6,
-        }
-
-if not filtered_gdf.empty:
-    folium.GeoJson(
-        filtered_gdf,
-        style_function=style_function,
-        tooltip=GeoJsonTooltip(
-            fields=["VILLAGE", "TEHSIL", "castor_ha"],
-            aliases=["Village:", "Tehsil:", "Castor (ha):"],
-            localize=True,
-        ),
+        detail_level = level_for_scope(selected_tehsil, location_filter)
+    with stage("village_layer", cache="hit"):
+        village_payload = village_layer_payload(
+            data_version, selected_tehsil, location_filter_key, detail_level, map_encoding,
+            shown_gdf, min_val, max_val,
+            compare_key=None if change is None else compare_key, _change=change, tiles=view_tiles,
+        )
+        add_bytes(village_payload["bytes"])
+    geojson_layer(
+        village_payload,
+        style=village_style(),
+        tooltip=GeoJsonTooltip(**village_tooltip_args),
         name="Villages",
-    ).add_to(m)
+        encoding=map_encoding,
+    ).add_to(village_group)
+
+# Selected village on top, at full resolution
+if len(selected_positions):
+    selected_rows = gdf.iloc[selected_positions]
+    if not selected_rows.empty:
+        if change is not None:
+            selected_rows = selected_rows.join(change[CHANGE_PROPERTIES].round(2))
+        folium.GeoJson(
+            selected_rows[VILLAGE_PROPERTIES + (CHANGE_PROPERTIES if change is not None else [])],
+            style=SELECTED_STYLE,
+            tooltip=GeoJsonTooltip(**village_tooltip_args),
+            name="Selected Village",
+        ).add_to(selection_group)
 
 # ============================
 # Polygons overlay
 # ============================
-def style_location(feature, color):
-    return {"fillColor": color, "color": "black", "weight": 2, "fillOpacity": 0.5}
+existing_gdf = filtered_polygons[filtered_polygons["id"] > SUGGESTED_MAX_ID]
+suggested_gdf = filtered_polygons[filtered_polygons["id"] <= SUGGESTED_MAX_ID]
 
-existing_gdf = filtered_polygons[filtered_polygons["id"] > 10]
-suggested_gdf = filtered_polygons[filtered_polygons["id"] <= 10]
+location_tooltip_args = dict(
+    fields=["id", "acreage", "castor_ha"],
+    aliases=["Location ID:", "Acreage (ha):", "Castor inside (ha):"],
+    localize=True,
+)
 
 # Existing polygons
 if show_existing and not existing_gdf.empty:
-    folium.GeoJson(
-        existing_gdf,
-        style_function=lambda x: style_location(x, "blue"),
-        tooltip=GeoJsonTooltip(fields=["id", "acreage"], aliases=["Location ID:", "Acreage (ha):"]),
+    existing_payload = location_layer_payload(
+        data_version, "existing", tuple(selected_ids), map_encoding, existing_gdf, castor_totals
+    )
+    add_bytes(existing_payload["bytes"])
+    geojson_layer(
+        existing_payload,
+        style=location_style("blue"),
+        tooltip=GeoJsonTooltip(**location_tooltip_args),
         name="Existing Locations",
-    ).add_to(m)
+        encoding=map_encoding,
+    ).add_to(location_group)
 
 # Suggested polygons
 if show_suggested and not suggested_gdf.empty:
-    folium.GeoJson(
-        suggested_gdf,
-        style_function=lambda x: style_location(x, "maroon"),
-        tooltip=GeoJsonTooltip(fields=["id", "acreage"], aliases=["Location ID:", "Acreage (ha):"]),
+    suggested_payload = location_layer_payload(
+        data_version, "suggested", tuple(selected_ids), map_encoding, suggested_gdf, castor_totals
+    )
+    add_bytes(suggested_payload["bytes"])
+    geojson_layer(
+        suggested_payload,
+        style=location_style("maroon"),
+        tooltip=GeoJsonTooltip(**location_tooltip_args),
         name="Suggested Locations",
-    ).add_to(m)
+        encoding=map_encoding,
+    ).add_to(location_group)
 
 # ============================
-# Add centroids with small markers + labels
+# Centroid markers + labels
 # ============================
+# One point layer with shared label styling; markers cluster and labels hide
+# until zoomed in, so the page stays light with many candidate sites.
+if show_existing or show_suggested:
+    CentroidLayer(
+        location_centroid_payload(
+            data_version, tuple(selected_ids), show_existing, show_suggested, filtered_polygons
+        ),
+    ).add_to(location_group)
+
+
 # ============================
-# Add centroids with improved visibility
+# Candidate sites
 # ============================
-for _, row in filtered_polygons.iterrows():
-    centroid = row.geometry.centroid
-    color = "red" if row["id"] <= 10 else "blue"  # match legend colors
+# Coloured by reachable castor area; the best sites also show their catchment
+if ranked is not None:
+    site_fill = ramp_colors(ranked["castor_ha"], ranked["castor_ha"].min(), ranked["castor_ha"].max())
+    sites = ranked.assign(fill=site_fill).round({"castor_ha": 2})
+    folium.GeoJson(
+        {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [row["lon"], row["lat"]]},
+                    "properties": {k: row[k] for k in ("rank", "id", "castor_ha", "villages", "fill")},
+                }
+                for row in sites.to_dict("records")
+            ],
+        },
+        marker=folium.CircleMarker(radius=6, fill=True),
+        style=candidate_style(),
+        tooltip=GeoJsonTooltip(
+            fields=["rank", "id", "castor_ha", "villages"],
+            aliases=["Rank:", "Site ID:", "Castor in catchment (ha):", "Villages:"],
+            localize=True,
+        ),
+        name="Candidate Sites",
+    ).add_to(candidate_group)
+    for row in ranked.head(TOP_CATCHMENTS).itertuples():
+        folium.Circle(
+            location=[row.lat, row.lon],
+            radius=radius_km * 1000,
+            color="purple",
+            weight=1,
+            fill=False,
+            dash_array="4",
+        ).add_to(candidate_group)
 
-    if (color == "red" and show_suggested) or (color == "blue" and show_existing):
-        # Larger circle marker for better visibility
+# ============================
+# Proposed sites
+# ============================
+if proposed is not None:
+    for row in proposed.itertuples():
+        folium.Circle(
+            location=[row.lat, row.lon],
+            radius=cover_km * 1000,
+            color="darkorange",
+            weight=1,
+            fill=True,
+            fill_opacity=0.05,
+        ).add_to(proposal_group)
         folium.CircleMarker(
-            location=[centroid.y, centroid.x],
-            radius=7,  # increased from 5
-            color=color,
+            location=[row.lat, row.lon],
+            radius=7,
+            color="black",
+            weight=1,
             fill=True,
-            fill_color=color,
-            fill_opacity=0.8,  # more visible
-            popup=f"ID: {row['id']}, Acreage: {row['acreage']} ha"
-        ).add_to(m)
-
-        # Smaller label on top
-        folium.Marker(
-            location=[centroid.y + 0.0001, centroid.x],
-            icon=folium.DivIcon(
-                html=f"""
-                <div style="
-                    display: inline-block;
-                    font-size: 8px;  /* decreased font size */
-                    color: black; 
-                    font-weight: bold; 
-                    text-align: center; 
-                    line-height: 1; 
-                    padding: 1px 3px; 
-                    background-color: white; 
-                    border-radius: 2px;
-                    box-sizing: border-box;">
-                    ID: {row['id']}<br>{row['acreage']} ha
-                </div>
-                """
-            )
-        ).add_to(m)
-
+            fill_color="darkorange",
+            fill_opacity=0.9,
+            tooltip=f"#{row.rank} {row.VILLAGE} (+{row.castor_ha_gain:,.0f} ha)",
+        ).add_to(proposal_group)
 
 # ============================
 # Map legend
@@ -225,54 +874,140 @@ m.get_root().html.add_child(folium.Element(legend_html))
 # ============================
 # Map -> Streamlit
 # ============================
-st_data = st_folium(m, width=1000, height=650)
+map_build.stop()
+with stage("st_folium"):
+    st_data = st_folium(
+        m,
+        width=1000,
+        height=650,
+        center=map_center,
+        feature_group_to_add=[village_group, location_group, selection_group, candidate_group, proposal_group],
+        key=MAP_KEY,
+    )
 
 # ============================
 # Village info panel
 # ============================
+# A click is resolved on the server, so it works in every village layer mode
+# and for villages outside the culled viewport layer
+info_position = None
+if st_data and st_data.get("last_clicked"):
+    with stage("click_lookup"):
+        info_position = click_lookup.village_at(
+            st_data["last_clicked"]["lng"], st_data["last_clicked"]["lat"], mask=village_mask
+        )
+if info_position is None and len(selected_positions):
+    info_position = int(selected_positions[0])
+
 village_info = None
-if st_data and "last_active_drawing" in st_data and st_data["last_active_drawing"]:
-    props = st_data["last_active_drawing"]["properties"]
+if info_position is not None:
+    hit = gdf.iloc[info_position]
     village_info = {
-        "Village": props.get("VILLAGE"),
-        "Tehsil": props.get("TEHSIL"),
-        "Castor Area (ha)": props.get("castor_ha"),
+        "Village": hit["VILLAGE"],
+        "Tehsil": hit["TEHSIL"],
+        "Castor Area (ha)": hit["castor_ha"],
     }
-elif selected_village != "All":
-    sel_row = filtered_gdf[filtered_gdf["VILLAGE"] == selected_village]
-    if not sel_row.empty:
-        village_info = {
-            "Village": sel_row["VILLAGE"].values[0],
-            "Tehsil": sel_row["TEHSIL"].values[0],
-            "Castor Area (ha)": sel_row["castor_ha"].values[0],
-        }
 
 if village_info:
     st.sidebar.subheader("Village Information")
     for k, v in village_info.items():
         st.sidebar.write(f"**{k}:** {v}")
 
+# ============================
+# Candidate site ranking
+# ============================
+if ranked is not None:
+    st.subheader(f"Candidate Sites by Castor Area within {radius_km:g} km")
+    st.dataframe(
+        ranked,
+        hide_index=True,
+        column_config={
+            "rank": "Rank",
+            "id": "Site ID",
+            "castor_ha": st.column_config.NumberColumn("Castor in Catchment (ha)", format="%.2f"),
+            "villages": "Villages",
+            "lat": None,
+            "lon": None,
+        },
+    )
+    st.download_button(
+        "📥 Download Site Ranking (CSV)",
+        data=partial(csv_bytes, ranked),
+        file_name=f"candidate_sites_{radius_km:g}km.csv",
+        mime="text/csv",
+    )
+
+# ============================
+# Proposed sites table
+# ============================
+if proposed is not None:
+    st.subheader(f"Proposed Collection Centres ({cover_km:g} km coverage)")
+    st.dataframe(
+        proposed,
+        hide_index=True,
+        column_config={
+            "rank": "Rank",
+            "VILLAGE": "Village",
+            "TEHSIL": "Tehsil",
+            "lat": None,
+            "lon": None,
+            "castor_ha_gain": st.column_config.NumberColumn("Added Castor (ha)", format="%.2f"),
+            "castor_ha_covered": st.column_config.NumberColumn("Total Covered (ha)", format="%.2f"),
+        },
+    )
+    st.download_button(
+        "📥 Download Proposed Sites (CSV)",
+        data=partial(csv_bytes, proposed),
+        file_name=f"proposed_sites_{len(proposed)}_{cover_km:g}km.csv",
+        mime="text/csv",
+    )
+
 # ============================
 # Download CSVs
 # ============================
-csv_data = gdf[["DISTRICT", "TEHSIL", "VILLAGE", "castor_ha"]].copy()
+# Files are generated only when a button is clicked, once per data version for
+# every worker of the host, so reruns and idle sessions hold no CSV strings.
 st.sidebar.download_button(
     "📥 Download District Data (CSV)",
-    data=csv_data.to_csv(index=False),
-    file_name="banaskantha_castor_acreage.csv",
+    data=partial(district_csv, data_version, gdf),
+    file_name=f"{dataset_slug(dataset)}_castor_acreage.csv",
     mime="text/csv",
 )
 
-for pid in selected_ids:
-    poly = loc_gdf[loc_gdf["id"] == pid]
-    villages_inside = gpd.sjoin(gdf, poly, predicate="intersects")
-    if not villages_inside.empty:
-        export_df = villages_inside[["VILLAGE", "TEHSIL", "castor_ha"]].copy()
-        st.sidebar.download_button(
-            f"📥 Download Villages (Polygon {pid})",
-            data=export_df.to_csv(index=False),
-            file_name=f"polygon_{pid}_villages.csv",
-            mime="text/csv",
+export_ids = [pid for pid in selected_ids if len(location_index.get(pid, EMPTY_ROWS))]
+if len(export_ids) > 1:
+    st.sidebar.download_button(
+        f"📥 Download Villages for {len(export_ids)} Polygons (ZIP)",
+        data=partial(polygons_zip_bytes, data_version, tuple(export_ids), gdf, apportionment),
+        file_name="polygon_villages.zip",
+        mime="application/zip",
+    )
+
+for pid in export_ids:
+    st.sidebar.download_button(
+        f"📥 Download Villages (Polygon {pid})",
+        data=partial(polygon_csv, data_version, pid, gdf, apportionment),
+        file_name=polygon_file_name(pid),
+        mime="text/csv",
+    )
+
+# ============================
+# Profiling
+# ============================
+# Hidden unless the page is opened with ?debug=1
+finish_rerun(profile)
+if st.query_params.get("debug") == "1":
+    with st.sidebar.expander("Profiling", expanded=True):
+        st.caption(f"Rerun: {profile.seconds * 1000:.0f} ms (to the end of the script)")
+        st.dataframe(
+            [{**entry, "seconds": entry["seconds"] * 1000} for entry in profile.stages],
+            hide_index=True,
+            column_config={
+                "stage": "Stage",
+                "seconds": st.column_config.NumberColumn("Time (ms)", format="%.1f"),
+                "cache": "Cache",
+                "bytes": st.column_config.NumberColumn("Bytes", format="%d"),
+            },
         )
 
 # import os
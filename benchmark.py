@@ -0,0 +1,296 @@
+"""Benchmark the dashboard's data and render pipeline without a browser.
+
+    python benchmark.py                                 # bundled layers at 1x, 10x, 100x
+    python benchmark.py --scales 1 10 --out bench.json
+    python benchmark.py --baseline bench_main.json      # exit 1 on a regression
+
+Every stage the dashboard goes through on a cold start (load, reprojection,
+simplification, summary, tehsil filter, village/location join, exports, map
+construction and its HTML) is run on the village and location layers, and on
+copies tiled side by side to scale them up. Wall time, peak traced memory and
+output bytes per stage are written as JSON, so runs on different commits or
+data seasons can be compared. Peak memory comes from a second, traced run of
+each stage (skip it with --no-memory).
+"""
+import os
+import sys
+import json
+import math
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+
+import numpy as np
+import pandas as pd
+import shapely
+import folium
+import geopandas as gpd
+from folium.features import GeoJsonTooltip
+
+from exports import DISTRICT_COLUMNS, csv_bytes, polygons_zip
+from geometry_levels import add_simplified_levels, level_geometries
+from intersections import apportioned_totals, build_apportionment, build_location_index, location_mask
+from layers import LEVEL_COLUMNS, LOCATIONS_SHP, SUGGESTED_MAX_ID, VILLAGES_SHP, add_derived_columns
+from map_layers import (
+    CentroidLayer, ScriptDependencies, TopoGeoJson, centroid_features, geojson_layer, layer_payload,
+    location_style, ramp_colors, village_style,
+)
+from summary import build_summary
+
+DEFAULT_SCALES = [1, 10, 100]
+ENCODINGS = ["TopoJSON", "GeoJSON"]
+VILLAGE_PROPERTIES = ["VILLAGE", "TEHSIL", "castor_ha", "geometry"]
+# A stage regresses when it is this much slower (or bigger) than the baseline,
+# and slower by more than the noise floor
+DEFAULT_THRESHOLD = 1.25
+NOISE_FLOOR_S = 0.05
+
+
+# ----------------------------
+# Synthetic scaled-up layers
+# ----------------------------
+def tile_layer(gdf, copies: int, id_column: str = None):
+    """``copies`` of ``gdf`` laid out on a grid next to each other.
+
+    Copies keep their attributes, except that tehsil names get the copy number
+    (so a tehsil filter stays as selective as on the original) and
+    ``id_column`` is offset to stay unique.
+    """
+    if copies == 1:
+        return gdf
+    minx, miny, maxx, maxy = gdf.total_bounds
+    width, height = maxx - minx, maxy - miny
+    cols = math.ceil(math.sqrt(copies))
+    geoms = gdf.geometry.to_numpy()
+    parts = []
+    for copy in range(copies):
+        dx, dy = (copy % cols) * width, (copy // cols) * height
+        part = gdf.set_geometry(shapely.transform(geoms, lambda coords, d=(dx, dy): coords + d), crs=gdf.crs)
+        if copy:
+            if "TEHSIL" in part:
+                part["TEHSIL"] = part["TEHSIL"].astype(str) + f" {copy + 1}"
+            if id_column and id_column in part:
+                part[id_column] = part[id_column] + copy * int(gdf[id_column].max())
+        parts.append(part)
+    return gpd.GeoDataFrame(pd.concat(parts, ignore_index=True), crs=gdf.crs)
+
+
+def write_scaled(villages_shp: str, locations_shp: str, copies: int, out_dir: str):
+    """Shapefiles of the layers scaled ``copies`` times, in their source CRS."""
+    paths = []
+    for shp_path, id_column in [(villages_shp, "OBJECTID"), (locations_shp, "id")]:
+        out = os.path.join(out_dir, f"x{copies}_{os.path.basename(shp_path)}")
+        tile_layer(gpd.read_file(shp_path), copies, id_column).to_file(out)
+        paths.append(out)
+    return paths
+
+
+# ----------------------------
+# Pipeline stages
+# ----------------------------
+# Each stage reads and replaces entries of the shared state (never mutating
+# them in place), so it can be re-run on a copy of its inputs, and returns the
+# rows it produced and the bytes it serialized, if any.
+def load(state):
+    state["gdf"] = gpd.read_file(state["villages_shp"])
+    state["loc_gdf"] = gpd.read_file(state["locations_shp"])
+    return len(state["gdf"]), None
+
+
+def reproject(state):
+    state["gdf"] = add_derived_columns(state["gdf"].to_crs(epsg=4326))
+    state["loc_gdf"] = add_derived_columns(state["loc_gdf"].to_crs(epsg=4326))
+    return len(state["gdf"]), None
+
+
+def simplify(state):
+    state["gdf"] = add_simplified_levels(state["gdf"])
+    return len(state["gdf"]), None
+
+
+def summarize(state):
+    state["summary"] = build_summary(state["gdf"], state["loc_gdf"])
+    return len(state["summary"]["tehsils"]), None
+
+
+def tehsil_filter(state):
+    # Every tehsil in turn, as picked in the sidebar
+    gdf = state["gdf"]
+    return sum(len(gdf[(gdf["TEHSIL"] == tehsil).to_numpy()]) for tehsil in state["summary"]["tehsils"]), None
+
+
+def sjoin_filter(state):
+    gdf = state["gdf"]
+    state["location_index"] = build_location_index(gdf, state["loc_gdf"])
+    ids = list(state["location_index"])
+    return len(gdf[location_mask(state["location_index"], ids, len(gdf))]), None
+
+
+def apportionment(state):
+    state["apportionment"] = build_apportionment(state["gdf"], state["loc_gdf"])
+    state["castor_totals"] = apportioned_totals(state["apportionment"], state["gdf"]["castor_ha"])
+    return sum(len(rows) for rows, _ in state["apportionment"].values()), None
+
+
+def exports(state):
+    gdf = state["gdf"]
+    district = csv_bytes(gdf[DISTRICT_COLUMNS])
+    archive = polygons_zip(gdf, state["apportionment"], sorted(state["apportionment"]))
+    return len(gdf), len(district) + len(archive)
+
+
+def folium_map(state):
+    """The dashboard's district-wide map: every village and location."""
+    gdf, loc_gdf, encoding = state["gdf"], state["loc_gdf"], state["encoding"]
+    m = folium.Map(location=[float(gdf["cy"].mean()), float(gdf["cx"].mean())], zoom_start=9,
+                   tiles="CartoDB positron")
+    ScriptDependencies(TopoGeoJson, CentroidLayer).add_to(m)
+
+    villages = level_geometries(gdf[VILLAGE_PROPERTIES + LEVEL_COLUMNS], "district")
+    villages["fill"] = ramp_colors(villages["castor_ha"], gdf["castor_ha"].min(), gdf["castor_ha"].max())
+    geojson_layer(
+        layer_payload(villages, encoding),
+        style=village_style(),
+        tooltip=GeoJsonTooltip(fields=["VILLAGE", "TEHSIL", "castor_ha"]),
+        encoding=encoding,
+    ).add_to(m)
+
+    locations = loc_gdf[["id", "acreage", "geometry"]].copy()
+    locations["castor_ha"] = locations["id"].map(state["castor_totals"]).round(2)
+    geojson_layer(layer_payload(locations, encoding), style=location_style("blue"), encoding=encoding).add_to(m)
+    suggested = (loc_gdf["id"] <= SUGGESTED_MAX_ID).to_numpy()
+    CentroidLayer(centroid_features(loc_gdf, np.where(suggested, "red", "blue"))).add_to(m)
+    state["map"] = m
+    return len(gdf) + len(loc_gdf), None
+
+
+def html_payload(state):
+    html = state["map"].get_root().render().encode("utf-8")
+    return len(state["gdf"]) + len(state["loc_gdf"]), len(html)
+
+
+STAGES = [
+    ("load", load),
+    ("reproject", reproject),
+    ("simplify", simplify),
+    ("summary", summarize),
+    ("tehsil_filter", tehsil_filter),
+    ("sjoin_filter", sjoin_filter),
+    ("apportionment", apportionment),
+    ("exports", exports),
+    ("folium_map", folium_map),
+    ("html_payload", html_payload),
+]
+
+
+def run_stage(stage, state: dict, trace_memory: bool = True) -> dict:
+    """Time ``stage`` on ``state``; then, for its peak memory, run it once more
+    on a copy of its inputs under tracemalloc, which would skew the timing."""
+    inputs = dict(state)
+    start = time.perf_counter()
+    rows, payload_bytes = stage(state)
+    record = {"wall_s": round(time.perf_counter() - start, 6), "rows": rows, "payload_bytes": payload_bytes}
+    record["peak_bytes"] = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            stage(inputs)
+            record["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return record
+
+
+def run_pipeline(villages_shp: str, locations_shp: str, scale: int, encoding: str,
+                 trace_memory: bool = True) -> list:
+    state = {"villages_shp": villages_shp, "locations_shp": locations_shp, "encoding": encoding}
+    results = []
+    for name, stage in STAGES:
+        record = {"scale": scale, "stage": name, **run_stage(stage, state, trace_memory)}
+        results.append(record)
+        print(f"  {name:<14} {record['wall_s']:9.3f}s"
+              + (f"  peak {record['peak_bytes'] / 2**20:8.1f} MiB" if trace_memory else "")
+              + (f"  {record['payload_bytes'] / 2**20:8.2f} MiB out" if record["payload_bytes"] else ""))
+    return results
+
+
+# ----------------------------
+# Results
+# ----------------------------
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def compare(results: list, baseline: list, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """Stages slower or bigger than ``threshold`` times their baseline."""
+    previous = {(b["scale"], b["stage"]): b for b in baseline}
+    regressions = []
+    for r in results:
+        b = previous.get((r["scale"], r["stage"]))
+        if b is None:
+            continue
+        slower = r["wall_s"] > b["wall_s"] * threshold and r["wall_s"] - b["wall_s"] > NOISE_FLOOR_S
+        bigger = bool(r["payload_bytes"] and b["payload_bytes"]) and r["payload_bytes"] > b["payload_bytes"] * threshold
+        print(f"  x{r['scale']:<4} {r['stage']:<14} {b['wall_s']:9.3f}s -> {r['wall_s']:9.3f}s"
+              + ("  REGRESSION" if slower or bigger else ""))
+        if slower or bigger:
+            regressions.append(r)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--villages", default=VILLAGES_SHP, help="village layer")
+    parser.add_argument("--locations", default=LOCATIONS_SHP, help="location layer")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="copies of the layers to benchmark (1 = as bundled)")
+    parser.add_argument("--encoding", choices=ENCODINGS, default=ENCODINGS[0], help="map data encoding")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the traced second run of every stage that measures peak memory")
+    parser.add_argument("--out", default="benchmark.json", help="JSON results to write")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown factor reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            print(f"x{scale}")
+            villages, locations = args.villages, args.locations
+            if scale != 1:
+                villages, locations = write_scaled(args.villages, args.locations, scale, tmp)
+            results += run_pipeline(villages, locations, scale, args.encoding, not args.no_memory)
+
+    report = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "geopandas": gpd.__version__,
+        "shapely": shapely.__version__,
+        "villages": args.villages,
+        "locations": args.locations,
+        "encoding": args.encoding,
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"-> {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"vs {args.baseline} ({baseline.get('commit') or 'unknown commit'})")
+        if compare(results, baseline["results"], args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Datasets the dashboard can show, partitioned by district and season.
+
+catalog.json (optional; without it the bundled Banas Kantha layers, current
+and previous season, are used):
+
+    {
+      "memory_budget_mb": 1024,
+      "datasets": [
+        {"district": "Banas Kantha", "season": "2024-25",
+         "villages": "data/banaskantha/2024-25/villages.shp",
+         "locations": "data/banaskantha/2024-25/polygons.shp",
+         "points": "data/banaskantha/2024-25/points_suggested.shp"}
+      ]
+    }
+
+``points`` is optional. Only the selected partition's layers are loaded; the
+layer store evicts the least recently used ones beyond the memory budget.
+"""
+import os
+import re
+import json
+
+from layers import (
+    KIND_COLUMNS, LOCATIONS_SHP, POINTS_SHP, PREVIOUS_VILLAGES_SHP, VILLAGES_SHP, layer_exists, read_attributes,
+    register_layer,
+)
+from summary import build_summary
+
+CATALOG_PATH = "catalog.json"
+DEFAULT_MEMORY_BUDGET_MB = 1024
+
+DEFAULT_DATASETS = [
+    {
+        "district": "Banas Kantha",
+        "season": None,
+        "villages": VILLAGES_SHP,
+        "locations": LOCATIONS_SHP,
+        "points": POINTS_SHP,
+    },
+    {
+        "district": "Banas Kantha",
+        "season": "Previous",
+        "villages": PREVIOUS_VILLAGES_SHP,
+        "locations": LOCATIONS_SHP,
+    },
+]
+
+
+def load_catalog(path: str = CATALOG_PATH) -> dict:
+    """Read and validate the catalog, registering every layer it lists."""
+    if os.path.exists(path):
+        with open(path) as f:
+            catalog = json.load(f)
+    else:
+        # Deployments may not ship the previous season
+        available = [entry for entry in DEFAULT_DATASETS if layer_exists(entry["villages"])]
+        catalog = {"datasets": available or DEFAULT_DATASETS[:1]}
+    catalog.setdefault("memory_budget_mb", DEFAULT_MEMORY_BUDGET_MB)
+
+    datasets, keys = [], set()
+    for entry in catalog.get("datasets", []):
+        missing = [k for k in ("district", "villages", "locations") if not entry.get(k)]
+        if missing:
+            raise ValueError(f"{path}: dataset {entry} is missing {', '.join(missing)}")
+        entry = {"season": None, "points": None, **entry}
+        if dataset_key(entry) in keys:
+            raise ValueError(f"{path}: duplicate dataset {dataset_key(entry)}")
+        keys.add(dataset_key(entry))
+        for kind in KIND_COLUMNS:
+            if entry.get(kind):
+                register_layer(entry[kind], kind)
+        datasets.append(entry)
+    if not datasets:
+        raise ValueError(f"{path}: no datasets")
+    catalog["datasets"] = datasets
+    return catalog
+
+
+def dataset_key(entry: dict) -> str:
+    return f"{entry['district']}/{entry['season'] or ''}"
+
+
+def dataset_slug(entry: dict) -> str:
+    """File-name friendly name, e.g. ``banaskantha_2024-25``."""
+    parts = [entry["district"]] + ([entry["season"]] if entry["season"] else [])
+    return "_".join(re.sub(r"[^a-z0-9-]+", "", p.lower()) for p in parts)
+
+
+def districts(catalog: dict) -> list:
+    return sorted({entry["district"] for entry in catalog["datasets"]})
+
+
+def seasons(catalog: dict, district: str) -> list:
+    """Seasons of a district in catalog order; list the current season first."""
+    return [entry["season"] for entry in catalog["datasets"] if entry["district"] == district]
+
+
+def season_label(season) -> str:
+    return season or "Current"
+
+
+def find_dataset(catalog: dict, district: str, season) -> dict:
+    for entry in catalog["datasets"]:
+        if entry["district"] == district and entry["season"] == season:
+            return entry
+    raise KeyError(f"No dataset for {district} / {season}")
+
+
+def partition_summary(entry: dict) -> dict:
+    """``summary.build_summary`` of a partition, read without its geometries."""
+    return build_summary(read_attributes(entry["villages"]), read_attributes(entry["locations"]))
@@ -0,0 +1,107 @@
+import io
+import os
+import zipfile
+import tempfile
+import numpy as np
+import pandas as pd
+import shapely
+import geopandas as gpd
+
+# ----------------------------
+# Candidate-site catchments
+# ----------------------------
+# Village/candidate pairs closer than MAX_RADIUS_KM are found once per data
+# version and candidate set; scoring a radius is then a masked bincount, so a
+# sweep over radii does not touch the geometries again.
+MAX_RADIUS_KM = 25
+METHODS = {
+    "centroid": "Village centre within radius",
+    "geometry": "Any part of village within radius",
+}
+
+
+def build_catchments(gdf, points, max_radius_km: float = MAX_RADIUS_KM, methods=tuple(METHODS)) -> dict:
+    """Village/candidate pairs within ``max_radius_km``, with their distances.
+
+    Returns arrays ``point``/``village`` (positions in ``points``/``gdf``) and
+    ``distance_km`` for each of ``methods`` (keys of ``METHODS``). Distances
+    are measured in the local UTM zone; ``centroid`` uses the precomputed
+    ``cx``/``cy`` columns.
+    """
+    crs = gdf.estimate_utm_crs()
+    max_m = max_radius_km * 1000.0
+    sites = points.geometry.to_crs(crs).to_numpy()
+    centres = gpd.GeoSeries(
+        gpd.points_from_xy(gdf["cx"], gdf["cy"]), crs="EPSG:4326"
+    ).to_crs(crs).to_numpy()
+    pairs = {}
+    for method in methods:
+        geoms = centres if method == "centroid" else gdf.geometry.to_crs(crs).to_numpy()
+        site_pos, village_pos = shapely.STRtree(geoms).query(sites, predicate="dwithin", distance=max_m)
+        pairs[method] = {
+            "point": site_pos,
+            "village": village_pos,
+            "distance_km": shapely.distance(sites[site_pos], geoms[village_pos]) / 1000.0,
+        }
+    return {"n_points": len(points), "max_radius_km": max_radius_km, "pairs": pairs}
+
+
+def score_points(catchments: dict, castor_ha, radius_km: float, method: str = "centroid"):
+    """Castor hectares and village count reachable from every candidate."""
+    pairs = catchments["pairs"][method]
+    within = pairs["distance_km"] <= radius_km
+    values = np.nan_to_num(np.asarray(castor_ha, dtype=float))
+    n = catchments["n_points"]
+    totals = np.bincount(pairs["point"][within], weights=values[pairs["village"][within]], minlength=n)
+    counts = np.bincount(pairs["point"][within], minlength=n)
+    return totals, counts
+
+
+def rank_candidates(points, totals, counts) -> pd.DataFrame:
+    """Candidates ordered by reachable castor area, best first."""
+    ranked = pd.DataFrame({
+        "id": points["id"].to_numpy(),
+        "castor_ha": totals,
+        "villages": counts,
+        "lat": points["cy"].to_numpy(),
+        "lon": points["cx"].to_numpy(),
+    })
+    ranked = ranked.sort_values(["castor_ha", "id"], ascending=[False, True], kind="stable")
+    ranked.insert(0, "rank", np.arange(1, len(ranked) + 1))
+    return ranked.reset_index(drop=True)
+
+
+# ----------------------------
+# Uploaded candidate sets
+# ----------------------------
+def read_candidates(name: str, data: bytes):
+    """Candidate points from an uploaded CSV (lon/lat columns), GeoJSON/GPKG or
+    zipped shapefile, in EPSG:4326 with ``id``, ``cx`` and ``cy`` columns."""
+    ext = os.path.splitext(name)[1].lower()
+    if ext == ".csv":
+        df = pd.read_csv(io.BytesIO(data))
+        cols = {c.lower(): c for c in df.columns}
+        lon = next((cols[c] for c in ("lon", "lng", "longitude", "x") if c in cols), None)
+        lat = next((cols[c] for c in ("lat", "latitude", "y") if c in cols), None)
+        if lon is None or lat is None:
+            raise ValueError("CSV needs lon/lat (or x/y) columns")
+        points = gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df[lon], df[lat]), crs="EPSG:4326")
+    elif ext == ".zip":
+        with tempfile.TemporaryDirectory() as tmp:
+            zipfile.ZipFile(io.BytesIO(data)).extractall(tmp)
+            shps = [os.path.join(root, f) for root, _, files in os.walk(tmp) for f in files if f.endswith(".shp")]
+            if not shps:
+                raise ValueError("ZIP contains no .shp file")
+            points = gpd.read_file(shps[0])
+    else:
+        points = gpd.read_file(io.BytesIO(data))
+
+    if points.crs is None:
+        points = points.set_crs(epsg=4326)
+    points = points.to_crs(epsg=4326)
+    points = points[points.geometry.notna() & ~points.geometry.is_empty]
+    # Polygons or lines are scored from their centre
+    points = points.set_geometry(points.geometry.representative_point())
+    if "id" not in points:
+        points["id"] = np.arange(1, len(points) + 1)
+    return points.assign(cx=points.geometry.x, cy=points.geometry.y).reset_index(drop=True)
@@ -0,0 +1,35 @@
+"""Compile the dashboard layers into the GeoParquet store read at startup.
+
+    python compile_data.py                 # every layer in the catalog (catalog.py)
+    python compile_data.py path/to/x.shp   # any other layer
+"""
+import argparse
+import time
+
+from catalog import load_catalog
+from layers import KIND_COLUMNS, compile_layer
+
+
+def catalog_layers(catalog: dict) -> list:
+    layers = []
+    for entry in catalog["datasets"]:
+        layers += [entry[kind] for kind in KIND_COLUMNS if entry.get(kind) and entry[kind] not in layers]
+    return layers
+
+
+def main(argv=None):
+    # Registers the catalog layers, so village layers get their simplified levels
+    catalog = load_catalog()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("layers", nargs="*", default=catalog_layers(catalog),
+                        help="shapefiles to compile (default: every catalog layer)")
+    args = parser.parse_args(argv)
+
+    for shp_path in args.layers:
+        start = time.perf_counter()
+        out = compile_layer(shp_path)
+        print(f"{shp_path} -> {out} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
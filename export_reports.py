@@ -0,0 +1,124 @@
+"""Write the per-location village reports without starting the dashboard.
+
+    python export_reports.py                          # CSV for every location id
+    python export_reports.py --format csv parquet     # both formats
+    python export_reports.py --ids 3 7 12 --out reports/new_sites
+
+Produces the same polygon_{pid}_villages.csv files as the dashboard buttons,
+plus location_summary.csv with village counts and castor totals per id (all
+touching villages, and area-weighted).
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from exports import POLYGON_COLUMNS, polygon_file_name, polygon_villages, write_csv
+from intersections import EMPTY_FRACTIONS, EMPTY_ROWS, build_apportionment
+from layers import LOCATIONS_SHP, VILLAGES_SHP, read_layer
+
+FORMATS = ["csv", "parquet"]
+SUMMARY_FILE = "location_summary.csv"
+
+# Village layer shared with the worker processes (set by _init_worker)
+_villages = None
+# Shards per worker, so one shard of large locations does not hold up the rest
+SHARDS_PER_WORKER = 4
+
+
+def _init_worker(villages) -> None:
+    global _villages
+    _villages = villages
+
+
+def write_report(pid: int, rows, fractions, out_dir: str, formats) -> dict:
+    """Write one location's village list and return its summary row."""
+    report = polygon_villages(_villages, rows, fractions)
+    for fmt in formats:
+        path = os.path.join(out_dir, polygon_file_name(pid, fmt))
+        if fmt == "csv":
+            with open(path, "wb") as f:
+                write_csv(report, f)
+        else:
+            report.to_parquet(path, index=False)
+    return {
+        "id": pid,
+        "villages": len(report),
+        "castor_ha": float(report["castor_ha"].sum()),
+        "castor_ha_apportioned": float(report["castor_ha_apportioned"].sum()),
+    }
+
+
+def export_shard(loc_gdf, location_ids, out_dir: str, formats) -> list:
+    """Resolve one shard of locations against the villages and write their reports.
+
+    ``loc_gdf`` holds every polygon of those ids, so ids split over several
+    polygons are apportioned as a whole.
+    """
+    apportionment = build_apportionment(_villages, loc_gdf)
+    return [
+        write_report(pid, *apportionment.get(pid, (EMPTY_ROWS, EMPTY_FRACTIONS)), out_dir, formats)
+        for pid in location_ids
+    ]
+
+
+def _export_shard_task(args) -> list:
+    return export_shard(*args)
+
+
+def export_reports(villages_shp: str = VILLAGES_SHP, locations_shp: str = LOCATIONS_SHP,
+                   out_dir: str = "reports", formats=("csv",), location_ids=None,
+                   workers: int = None) -> pd.DataFrame:
+    """Write reports for ``location_ids`` (default: all) and the summary table.
+
+    The locations are split into shards by id; a pool of ``workers``
+    processes resolves each shard's village overlaps (the expensive part)
+    and writes its reports. The village layer is sent to each worker once.
+    """
+    gdf = read_layer(villages_shp, columns=POLYGON_COLUMNS)
+    loc_gdf = read_layer(locations_shp, columns=["id", "acreage"])
+    if location_ids is None:
+        location_ids = sorted(int(pid) for pid in loc_gdf["id"].unique())
+    location_ids = [int(pid) for pid in location_ids]
+    os.makedirs(out_dir, exist_ok=True)
+
+    workers = min(workers or os.cpu_count() or 1, len(location_ids) or 1)
+    shards = [
+        list(ids) for ids in np.array_split(location_ids, min(len(location_ids), workers * SHARDS_PER_WORKER))
+    ] if workers > 1 else [location_ids]
+    ids = loc_gdf["id"].to_numpy()
+    tasks = [(loc_gdf[np.isin(ids, shard)], shard, out_dir, list(formats)) for shard in shards]
+    if workers == 1:
+        _init_worker(gdf)
+        rows = [row for task in tasks for row in _export_shard_task(task)]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(gdf,)) as pool:
+            rows = [row for shard_rows in pool.map(_export_shard_task, tasks) for row in shard_rows]
+
+    acreage = loc_gdf.drop_duplicates("id").set_index("id")["acreage"]
+    summary = pd.DataFrame(rows, columns=["id", "villages", "castor_ha", "castor_ha_apportioned"])
+    summary.insert(1, "acreage", summary["id"].map(acreage))
+    summary.to_csv(os.path.join(out_dir, SUMMARY_FILE), index=False)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--villages", default=VILLAGES_SHP, help="village layer")
+    parser.add_argument("--locations", default=LOCATIONS_SHP, help="location polygon layer")
+    parser.add_argument("--out", default="reports", help="output directory")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["csv"], dest="formats")
+    parser.add_argument("--ids", nargs="+", type=int, help="location ids (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summary = export_reports(args.villages, args.locations, args.out, args.formats, args.ids, args.workers)
+    print(f"{len(summary)} locations -> {args.out} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
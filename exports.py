@@ -0,0 +1,66 @@
+import io
+import zipfile
+
+# ----------------------------
+# CSV / ZIP exports
+# ----------------------------
+DISTRICT_COLUMNS = ["DISTRICT", "TEHSIL", "VILLAGE", "castor_ha"]
+POLYGON_COLUMNS = ["VILLAGE", "TEHSIL", "castor_ha"]
+CHUNK_ROWS = 20_000
+
+
+def polygon_file_name(pid, ext: str = "csv") -> str:
+    return f"polygon_{pid}_villages.{ext}"
+
+
+def iter_csv(df, chunk_rows: int = CHUNK_ROWS):
+    """Yield ``df`` as UTF-8 CSV bytes, a block of rows at a time."""
+    yield df.iloc[:0].to_csv(index=False).encode("utf-8")
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=False).encode("utf-8")
+
+
+def write_csv(df, out, chunk_rows: int = CHUNK_ROWS) -> None:
+    for chunk in iter_csv(df, chunk_rows):
+        out.write(chunk)
+
+
+def csv_bytes(df, chunk_rows: int = CHUNK_ROWS) -> bytes:
+    buf = io.BytesIO()
+    write_csv(df, buf, chunk_rows)
+    return buf.getvalue()
+
+
+def polygon_villages(gdf, rows, fractions=None):
+    """Villages of one location, as exported: positional ``rows`` of ``gdf``.
+
+    With the area ``fractions`` from ``intersections.build_apportionment`` the
+    share of each village inside the location and its apportioned castor
+    hectares are added.
+    """
+    df = gdf.iloc[rows][POLYGON_COLUMNS]
+    if fractions is not None:
+        df = df.assign(
+            overlap_fraction=fractions,
+            castor_ha_apportioned=df["castor_ha"].to_numpy(dtype=float) * fractions,
+        )
+    return df
+
+
+def polygons_zip(gdf, apportionment: dict, location_ids) -> bytes:
+    """One ZIP with a village CSV per location id that touches any village.
+
+    ``apportionment`` maps ids to ``(rows, fractions)``.
+
+    Each member is streamed into the archive, so only one chunk of one
+    location's CSV is held besides the compressed output.
+    """
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for pid in location_ids:
+            rows, fractions = apportionment.get(pid, ((), None))
+            if not len(rows):
+                continue
+            with zf.open(polygon_file_name(pid), "w") as member:
+                write_csv(polygon_villages(gdf, rows, fractions), member)
+    return buf.getvalue()
@@ -0,0 +1,68 @@
+import numpy as np
+import shapely
+import geopandas as gpd
+
+# ----------------------------
+# Simplification pyramid
+# ----------------------------
+# level -> map zoom it is drawn at and simplification tolerance (degrees).
+# A tolerance of 0 means the full-resolution geometry column.
+LEVELS = {
+    "district": {"zoom": 9, "tolerance": 0.002},
+    "tehsil": {"zoom": 11, "tolerance": 0.0005},
+    "village": {"zoom": 13, "tolerance": 0.0},
+}
+
+
+def level_column(level: str) -> str:
+    return "geometry" if LEVELS[level]["tolerance"] == 0 else f"geom_{level}"
+
+
+def simplify_coverage(geoms, tolerance: float) -> np.ndarray:
+    """Simplify polygons that share edges without opening gaps between them."""
+    geoms = np.asarray(geoms)
+    try:
+        return shapely.coverage_simplify(geoms, tolerance)
+    except (AttributeError, shapely.errors.UnsupportedGEOSVersionError,
+            shapely.errors.GEOSException):
+        # shapely < 2.1, GEOS < 3.12, or an invalid coverage: simplify each
+        # feature on its own. This is Douglas-Peucker, where the tolerance is
+        # a maximum distance rather than coverage_simplify's Visvalingam-Whyatt
+        # area (roughly its square root), and neighbours are simplified
+        # independently, so shared boundaries can drift apart into gaps and
+        # overlaps.
+        return shapely.simplify(geoms, tolerance, preserve_topology=True)
+
+
+def add_simplified_levels(gdf):
+    levels = {}
+    for level, spec in LEVELS.items():
+        if spec["tolerance"]:
+            simplified = simplify_coverage(gdf.geometry.to_numpy(), spec["tolerance"])
+            levels[level_column(level)] = gpd.GeoSeries(simplified, index=gdf.index, crs=gdf.crs)
+    return gdf.assign(**levels)
+
+
+def level_for_zoom(zoom: float) -> str:
+    level = "district"
+    for name, spec in LEVELS.items():
+        if zoom >= spec["zoom"]:
+            level = name
+    return level
+
+
+def level_for_scope(tehsil: str, location_filter: bool = False) -> str:
+    """Coarsest level that still looks right for the current filter scope."""
+    if tehsil == "All" and not location_filter:
+        return "district"
+    return "tehsil"
+
+
+def level_geometries(gdf, level: str):
+    """``gdf`` with its geometry swapped for the given level."""
+    column = level_column(level)
+    if column not in gdf:
+        return gdf
+    geoms = gdf[column].to_numpy()
+    data = gdf.drop(columns=[c for c in gdf.columns if c.startswith("geom_")] + ["geometry"])
+    return gpd.GeoDataFrame(data, geometry=geoms, crs=gdf.crs)
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "castor_dashboard"
+
+# ----------------------------
+# Per-rerun profile
+# ----------------------------
+# Streamlit runs each script rerun on its own thread, so the active profile and
+# stage are thread-local: cached function bodies report to the rerun that
+# called them, whatever other sessions are doing.
+_local = threading.local()
+
+
+class RerunProfile:
+    """Timings of the stages of one script rerun, in the order they ran."""
+
+    def __init__(self):
+        self.stages = []
+        self.started = time.perf_counter()
+        self.seconds = None
+
+    def to_dict(self) -> dict:
+        return {"seconds": self.seconds, "stages": self.stages}
+
+
+def start_rerun() -> RerunProfile:
+    profile = RerunProfile()
+    _local.profile = profile
+    _local.stage = None
+    return profile
+
+
+def finish_rerun(profile: RerunProfile) -> None:
+    """Close the profile, add it to the process metrics and log it as one JSON line."""
+    profile.seconds = round(time.perf_counter() - profile.started, 6)
+    if getattr(_local, "profile", None) is profile:
+        _local.profile = None
+    METRICS.observe_rerun(profile)
+    logger.info("rerun %s", json.dumps(profile.to_dict()))
+
+
+class Stage:
+    """A timed block of the current rerun, used as a context manager or, for
+    a whole section of the script, through ``start``/``stop``.
+
+    For a cached call pass ``cache="hit"``; the cached function body marks a
+    miss with ``cache_miss``. Outside a rerun (e.g. a download generated on
+    click) the stage only goes to the process metrics.
+    """
+
+    def __init__(self, name: str, cache: str = None):
+        self.entry = {"stage": name, "seconds": None, "cache": cache, "bytes": None}
+        self._outer = None
+        self._start = None
+
+    def start(self):
+        self._outer = getattr(_local, "stage", None)
+        _local.stage = self.entry
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self) -> None:
+        self.entry["seconds"] = round(time.perf_counter() - self._start, 6)
+        _local.stage = self._outer
+        profile = getattr(_local, "profile", None)
+        if profile is not None:
+            profile.stages.append(self.entry)
+        else:
+            METRICS.observe_stage(self.entry)
+
+    def __enter__(self):
+        self.start()
+        return self.entry
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+stage = Stage
+
+
+def cache_miss() -> None:
+    """Call at the top of a cached function: its body only runs on a miss."""
+    entry = getattr(_local, "stage", None)
+    if entry is not None and entry["cache"] is not None:
+        entry["cache"] = "miss"
+
+
+def add_bytes(n: int) -> None:
+    entry = getattr(_local, "stage", None)
+    if entry is not None:
+        entry["bytes"] = (entry["bytes"] or 0) + int(n)
+
+
+# ----------------------------
+# Process-wide metrics
+# ----------------------------
+class Metrics:
+    """Counters aggregated over every rerun of the process, in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reruns = 0
+        self.rerun_seconds = 0.0
+        self.stage_seconds = {}   # stage -> [sum, count]
+        self.cache_requests = {}  # (stage, hit|miss) -> count
+        self.payload_bytes = {}   # stage -> bytes of its latest run
+
+    def observe_stage(self, entry: dict) -> None:
+        with self._lock:
+            self._observe_stage(entry)
+
+    def observe_rerun(self, profile: RerunProfile) -> None:
+        with self._lock:
+            self.reruns += 1
+            self.rerun_seconds += profile.seconds
+            for entry in profile.stages:
+                self._observe_stage(entry)
+
+    def _observe_stage(self, entry: dict) -> None:
+        # Caller holds the lock
+        total = self.stage_seconds.setdefault(entry["stage"], [0.0, 0])
+        total[0] += entry["seconds"]
+        total[1] += 1
+        if entry["cache"] is not None:
+            key = (entry["stage"], entry["cache"])
+            self.cache_requests[key] = self.cache_requests.get(key, 0) + 1
+        if entry["bytes"] is not None:
+            self.payload_bytes[entry["stage"]] = entry["bytes"]
+
+    def exposition(self) -> str:
+        p = METRIC_PREFIX
+        with self._lock:
+            lines = [
+                f"# HELP {p}_reruns_total Script reruns profiled.",
+                f"# TYPE {p}_reruns_total counter",
+                f"{p}_reruns_total {self.reruns}",
+                f"# HELP {p}_rerun_seconds Wall time of whole reruns.",
+                f"# TYPE {p}_rerun_seconds summary",
+                f"{p}_rerun_seconds_sum {self.rerun_seconds:.6f}",
+                f"{p}_rerun_seconds_count {self.reruns}",
+                f"# HELP {p}_stage_seconds Wall time per stage.",
+                f"# TYPE {p}_stage_seconds summary",
+            ]
+            for name, (seconds, count) in sorted(self.stage_seconds.items()):
+                lines.append(f'{p}_stage_seconds_sum{{stage="{_label(name)}"}} {seconds:.6f}')
+                lines.append(f'{p}_stage_seconds_count{{stage="{_label(name)}"}} {count}')
+            lines += [
+                f"# HELP {p}_cache_requests_total Cached calls per stage and result.",
+                f"# TYPE {p}_cache_requests_total counter",
+            ]
+            for (name, result), count in sorted(self.cache_requests.items()):
+                lines.append(f'{p}_cache_requests_total{{stage="{_label(name)}",result="{result}"}} {count}')
+            lines += [
+                f"# HELP {p}_payload_bytes Bytes serialized by the latest run of a stage.",
+                f"# TYPE {p}_payload_bytes gauge",
+            ]
+            for name, n in sorted(self.payload_bytes.items()):
+                lines.append(f'{p}_payload_bytes{{stage="{_label(name)}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = Metrics()
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1", metrics: Metrics = METRICS, status=None):
+    """Serve ``metrics`` at http://host:port/metrics on a daemon thread.
+
+    With ``status``, a callable returning a dict with a ``ready`` flag, the
+    same server answers readiness checks at /ready: 200 when ready, else 503,
+    with the status as JSON. Metrics and readiness are per process, so each
+    worker needs its own port; raises RuntimeError when ``port`` is taken.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/metrics":
+                self._send(200, metrics.exposition(), "text/plain; version=0.0.4; charset=utf-8")
+            elif path == "/ready" and status is not None:
+                current = dict(status(), pid=os.getpid(), port=self.server.server_port)
+                self._send(200 if current["ready"] else 503, json.dumps(current), "application/json")
+            else:
+                self.send_error(404)
+
+        def _send(self, code: int, text: str, content_type: str):
+            body = text.encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as exc:
+        # Whoever holds the port would answer readiness checks meant for this worker
+        raise RuntimeError(f"Worker {os.getpid()} cannot serve metrics on {host}:{port}: {exc}") from exc
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info("Worker %d serving metrics on http://%s:%d/metrics", os.getpid(), host, port)
+    return server
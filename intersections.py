@@ -0,0 +1,123 @@
+import numpy as np
+import shapely
+
+EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+
+# ----------------------------
+# Village <-> location intersection index
+# ----------------------------
+def build_location_index(gdf, loc_gdf) -> dict:
+    """Map every location id to the positional rows of the villages it intersects."""
+    loc_pos, village_pos = gdf.sindex.query(loc_gdf.geometry, predicate="intersects")
+    ids = loc_gdf["id"].to_numpy().astype(np.int64)[loc_pos]
+
+    index = {int(pid): EMPTY_ROWS for pid in loc_gdf["id"].unique()}
+    if len(ids) == 0:
+        return index
+
+    order = np.lexsort((village_pos, ids))
+    ids, village_pos = ids[order], village_pos[order].astype(np.int64)
+    unique_ids, starts = np.unique(ids, return_index=True)
+    for pid, rows in zip(unique_ids, np.split(village_pos, starts[1:])):
+        index[int(pid)] = np.unique(rows)
+    return index
+
+
+def villages_for_locations(index: dict, location_ids) -> np.ndarray:
+    """Sorted, de-duplicated village rows touching any of the given locations."""
+    rows = [index.get(int(pid), EMPTY_ROWS) for pid in location_ids]
+    if not rows:
+        return EMPTY_ROWS
+    return np.unique(np.concatenate(rows))
+
+
+def location_mask(index: dict, location_ids, n_villages: int) -> np.ndarray:
+    """Boolean mask over the village rows touching any of the given locations."""
+    mask = np.zeros(n_villages, dtype=bool)
+    mask[villages_for_locations(index, location_ids)] = True
+    return mask
+
+
+# ----------------------------
+# Area-weighted apportionment
+# ----------------------------
+EMPTY_FRACTIONS = np.empty(0, dtype=float)
+
+
+def build_apportionment(gdf, loc_gdf) -> dict:
+    """Map every location id to ``(rows, fractions)``.
+
+    ``rows`` are the villages it intersects, exactly as in
+    ``build_location_index``; ``fractions`` the share of each village's area
+    lying inside the location. Areas are measured in the local UTM zone.
+    """
+    loc_pos, village_pos = gdf.sindex.query(loc_gdf.geometry, predicate="intersects")
+    index = {int(pid): (EMPTY_ROWS, EMPTY_FRACTIONS) for pid in loc_gdf["id"].unique()}
+    if len(loc_pos) == 0:
+        return index
+
+    crs = gdf.estimate_utm_crs()
+    villages = gdf.geometry.to_crs(crs).to_numpy()
+    locations = loc_gdf.geometry.to_crs(crs).to_numpy()
+    village_area = shapely.area(villages)
+    overlap = shapely.area(shapely.intersection(villages[village_pos], locations[loc_pos]))
+    fractions = np.divide(
+        overlap, village_area[village_pos],
+        out=np.zeros(len(overlap)), where=village_area[village_pos] > 0,
+    )
+
+    # Several polygons can share an id: sum their shares of the same village
+    ids = loc_gdf["id"].to_numpy().astype(np.int64)[loc_pos]
+    village_pos = village_pos.astype(np.int64)
+    order = np.lexsort((village_pos, ids))
+    ids, village_pos, fractions = ids[order], village_pos[order], fractions[order]
+    first = np.ones(len(ids), dtype=bool)
+    first[1:] = (ids[1:] != ids[:-1]) | (village_pos[1:] != village_pos[:-1])
+    starts = np.flatnonzero(first)
+    ids, village_pos = ids[starts], village_pos[starts]
+    fractions = np.minimum(np.add.reduceat(fractions, starts), 1.0)
+
+    unique_ids, id_starts = np.unique(ids, return_index=True)
+    for pid, rows, shares in zip(
+        unique_ids, np.split(village_pos, id_starts[1:]), np.split(fractions, id_starts[1:])
+    ):
+        index[int(pid)] = (rows, shares)
+    return index
+
+
+def apportioned_totals(apportionment: dict, castor_ha) -> dict:
+    """Castor hectares per location id, each village weighted by its area share."""
+    values = np.nan_to_num(np.asarray(castor_ha, dtype=float))
+    return {
+        pid: float(np.dot(values[rows], shares)) if len(rows) else 0.0
+        for pid, (rows, shares) in apportionment.items()
+    }
+
+
+# ----------------------------
+# Flat form, for the shared cache
+# ----------------------------
+def pack_index(index: dict) -> dict:
+    """``{id: rows}`` or ``{id: (rows, fractions)}`` as flat arrays."""
+    values = list(index.values())
+    paired = bool(values) and isinstance(values[0], tuple)
+    rows = [v[0] if paired else v for v in values]
+    arrays = {
+        "ids": np.fromiter(index, dtype=np.int64, count=len(index)),
+        "offsets": np.concatenate([[0], np.cumsum([len(r) for r in rows], dtype=np.int64)]),
+        "rows": np.concatenate(rows).astype(np.int64) if rows else EMPTY_ROWS,
+    }
+    if paired:
+        arrays["fractions"] = np.concatenate([v[1] for v in values]).astype(float)
+    return arrays
+
+
+def unpack_index(arrays: dict) -> dict:
+    """Inverse of ``pack_index``; the values are views into the flat arrays."""
+    spans = zip(arrays["ids"].tolist(), arrays["offsets"][:-1].tolist(), arrays["offsets"][1:].tolist())
+    rows = arrays["rows"]
+    if "fractions" in arrays:
+        fractions = arrays["fractions"]
+        return {pid: (rows[a:b], fractions[a:b]) for pid, a, b in spans}
+    return {pid: rows[a:b] for pid, a, b in spans}
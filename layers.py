@@ -0,0 +1,334 @@
+import os
+import glob
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+import shapely
+import pandas as pd
+import geopandas as gpd
+import pyarrow.parquet as pq
+
+from geometry_levels import LEVELS, add_simplified_levels, level_column
+
+logger = logging.getLogger(__name__)
+
+VILLAGES_SHP = "shp/castor_village_level_acreage_ha_new_int.shp"
+LOCATIONS_SHP = "shp/polygons.shp"
+POINTS_SHP = "shp/points_suggested.shp"
+# Previous season's village layer, for season-over-season comparison
+PREVIOUS_VILLAGES_SHP = "castor_village_level_acreage_ha_new.shp"
+# polygons.shp ids up to this are suggested locations, higher ids existing sites
+SUGGESTED_MAX_ID = 10
+COMPILED_DIR = "compiled"
+MANIFEST = "manifest.json"
+
+# Derived per-feature columns: centroid and bounding box, in EPSG:4326
+DERIVED_COLUMNS = ["cx", "cy", "minx", "miny", "maxx", "maxy"]
+
+LEVEL_COLUMNS = [level_column(level) for level in LEVELS if level_column(level) != "geometry"]
+
+# Columns the dashboard actually reads from each kind of layer
+KIND_COLUMNS = {
+    "villages": ["OBJECTID", "DISTRICT", "TEHSIL", "VILLAGE", "castor_ha"] + DERIVED_COLUMNS + LEVEL_COLUMNS,
+    "locations": ["id", "acreage"] + DERIVED_COLUMNS,
+    "points": ["id", "acreage"] + DERIVED_COLUMNS,
+}
+
+# Registered layers: path -> columns read, and the layers that also carry the
+# simplified geometry pyramid (geometry_levels.py)
+LAYER_COLUMNS = {}
+SIMPLIFIED_LAYERS = set()
+
+
+def register_layer(shp_path: str, kind: str) -> None:
+    """Declare ``shp_path`` as a layer of ``kind`` (a key of ``KIND_COLUMNS``)."""
+    LAYER_COLUMNS[shp_path] = KIND_COLUMNS[kind]
+    if kind == "villages":
+        SIMPLIFIED_LAYERS.add(shp_path)
+
+
+register_layer(VILLAGES_SHP, "villages")
+register_layer(LOCATIONS_SHP, "locations")
+register_layer(POINTS_SHP, "points")
+register_layer(PREVIOUS_VILLAGES_SHP, "villages")
+
+
+# ----------------------------
+# Helpers for paths & caching
+# ----------------------------
+def shapefile_mtime_key(shp_path: str) -> float:
+    stem = os.path.splitext(shp_path)[0]
+    sidecars = glob.glob(stem + ".*")
+    if not sidecars:
+        return 0.0
+    return max(os.path.getmtime(f) for f in sidecars)
+
+
+def add_derived_columns(gdf):
+    # Centroids are taken in the local UTM zone so they are not skewed by lon/lat
+    centroids = gdf.geometry.to_crs(gdf.estimate_utm_crs()).centroid.to_crs(epsg=4326)
+    bounds = gdf.geometry.bounds
+    return gdf.assign(
+        cx=centroids.x.to_numpy(),
+        cy=centroids.y.to_numpy(),
+        minx=bounds["minx"].to_numpy(),
+        miny=bounds["miny"].to_numpy(),
+        maxx=bounds["maxx"].to_numpy(),
+        maxy=bounds["maxy"].to_numpy(),
+    )
+
+
+def read_shapefile(shp_path: str):
+    gdf = gpd.read_file(shp_path)
+    gdf = gdf.to_crs(epsg=4326)
+    gdf = add_derived_columns(gdf)
+    if shp_path in SIMPLIFIED_LAYERS:
+        gdf = add_simplified_levels(gdf)
+    return gdf
+
+
+# ----------------------------
+# Compiled (GeoParquet) store
+# ----------------------------
+def compiled_path(shp_path: str, compiled_dir: str = COMPILED_DIR) -> str:
+    # Mirror the source tree, so partitions with the same file names do not collide
+    rel = os.path.splitdrive(os.path.normpath(shp_path))[1].lstrip(os.sep)
+    return os.path.join(compiled_dir, os.path.splitext(rel)[0] + ".parquet")
+
+
+def read_manifest(compiled_dir: str = COMPILED_DIR) -> dict:
+    try:
+        with open(os.path.join(compiled_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def compile_layer(shp_path: str, compiled_dir: str = COMPILED_DIR) -> str:
+    """Write the reprojected layer plus derived columns as GeoParquet."""
+    source_version = shapefile_mtime_key(shp_path)
+    out = compiled_path(shp_path, compiled_dir)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    read_shapefile(shp_path).to_parquet(out, index=False)
+
+    manifest = read_manifest(compiled_dir)
+    manifest[shp_path] = {"path": out, "source_version": source_version}
+    with open(os.path.join(compiled_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return out
+
+
+def compiled_is_fresh(shp_path: str, compiled_dir: str = COMPILED_DIR) -> bool:
+    if not os.path.exists(compiled_path(shp_path, compiled_dir)):
+        return False
+    if not os.path.exists(shp_path):
+        # Deployments may ship only the compiled store
+        return True
+    entry = read_manifest(compiled_dir).get(shp_path, {})
+    return entry.get("source_version") == shapefile_mtime_key(shp_path)
+
+
+def layer_exists(shp_path: str, compiled_dir: str = COMPILED_DIR) -> bool:
+    return os.path.exists(shp_path) or os.path.exists(compiled_path(shp_path, compiled_dir))
+
+
+def layer_version(shp_path: str, compiled_dir: str = COMPILED_DIR) -> float:
+    compiled = compiled_path(shp_path, compiled_dir)
+    compiled_mtime = os.path.getmtime(compiled) if os.path.exists(compiled) else 0.0
+    return max(shapefile_mtime_key(shp_path), compiled_mtime)
+
+
+def source_version(shp_path: str, compiled_dir: str = COMPILED_DIR) -> float:
+    """Version of a layer's source data, unchanged by recompiling it.
+
+    The shapefile's mtime key, or the one recorded in the manifest when only
+    the compiled store is shipped.
+    """
+    if os.path.exists(shp_path):
+        return shapefile_mtime_key(shp_path)
+    return read_manifest(compiled_dir).get(shp_path, {}).get("source_version", 0.0)
+
+
+def read_layer(shp_path: str, columns=None):
+    """Load a layer in EPSG:4326, preferring the compiled store when it is fresh.
+
+    Only ``columns`` (default: ``LAYER_COLUMNS`` for the layer) plus the
+    geometry are read from the compiled store. Columns the layer does not have
+    (e.g. an optional key) are skipped.
+    """
+    if columns is None:
+        columns = LAYER_COLUMNS.get(shp_path)
+    if compiled_is_fresh(shp_path):
+        path = compiled_path(shp_path)
+        read_columns = None
+        if columns is not None:
+            available = set(pq.read_schema(path).names)
+            read_columns = [c for c in columns if c in available] + ["geometry"]
+        return gpd.read_parquet(path, columns=read_columns)
+
+    if os.path.exists(compiled_path(shp_path)):
+        logger.warning("Compiled store for %s is stale, reading the shapefile", shp_path)
+    gdf = read_shapefile(shp_path)
+    if columns is not None:
+        gdf = gdf[[c for c in columns if c in gdf] + ["geometry"]]
+    return gdf
+
+
+def read_attributes(shp_path: str, columns=None) -> pd.DataFrame:
+    """Attribute columns of a layer without its geometries.
+
+    Geometry is not read from the compiled store; a shapefile is read in full
+    and its geometry dropped. Defaults to the registered non-geometry columns.
+    """
+    if columns is None:
+        columns = [c for c in LAYER_COLUMNS.get(shp_path, []) if c not in LEVEL_COLUMNS] or None
+    if compiled_is_fresh(shp_path):
+        path = compiled_path(shp_path)
+        if columns is not None:
+            available = set(pq.read_schema(path).names)
+            columns = [c for c in columns if c in available]
+        return pd.read_parquet(path, columns=columns)
+    return pd.DataFrame(read_layer(shp_path, columns).drop(columns="geometry"))
+
+
+def frame_nbytes(gdf) -> int:
+    """Approximate in-memory size of a (Geo)DataFrame, geometries included."""
+    total = 0
+    for name, column in gdf.items():
+        if isinstance(column.dtype, gpd.array.GeometryDtype):
+            coords = shapely.get_num_coordinates(column.to_numpy())
+            total += int(coords.sum()) * 16 + len(column) * 100
+        else:
+            total += int(column.memory_usage(deep=True, index=False))
+    return total
+
+
+# ----------------------------
+# Versioned layer store
+# ----------------------------
+class LayerStore:
+    """Process-wide holder of loaded layers, keyed on their on-disk versions.
+
+    The first request for a layer loads it synchronously. Afterwards, when the
+    files on disk change, the new version is read on a background thread while
+    the previous one keeps being served; unchanged layers are never re-read.
+    Any change counts, including files restored with an older mtime. A version
+    that fails to read is not retried until the files change again.
+
+    With a ``memory_budget`` (bytes), the least recently used layers are
+    dropped once the loaded layers exceed it; they are read again on demand.
+    The budget counts only the layers held here: ``on_evict(path)`` is called
+    for each dropped layer, so whatever was built from it can be released too.
+    """
+
+    def __init__(self, loader=read_layer, check_interval: float = 2.0, memory_budget: int = None,
+                 on_evict=None):
+        self.loader = loader
+        self.check_interval = check_interval
+        self.memory_budget = memory_budget
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+        self._layers = OrderedDict()  # path -> (version, gdf), least recently used first
+        self._sizes = {}              # path -> approximate bytes in memory
+        self._reloading = {}          # path -> version being read
+        self._failed = {}             # path -> version whose read failed
+        self._checked_at = {}         # path -> time of last mtime check
+
+    def get(self, path: str):
+        """Return ``(gdf, version)`` for the layer, scheduling a reload if stale."""
+        with self._lock:
+            current = self._layers.get(path)
+            due = False
+            if current is not None:
+                self._layers.move_to_end(path)
+                now = time.monotonic()
+                due = now - self._checked_at.get(path, 0.0) >= self.check_interval
+                if due:
+                    self._checked_at[path] = now
+        if current is None:
+            return self._load_now(path)
+
+        if due:
+            version = layer_version(path)
+            if version != current[0]:
+                self._reload_in_background(path, version)
+        version, gdf = current
+        return gdf, version
+
+    def versions(self) -> dict:
+        with self._lock:
+            return {path: version for path, (version, _) in self._layers.items()}
+
+    def _store(self, path: str, version: float, gdf) -> list:
+        # Caller holds the lock, and passes the evicted paths to _released
+        # once it has let go of it
+        self._layers[path] = (version, gdf)
+        self._layers.move_to_end(path)
+        self._sizes[path] = frame_nbytes(gdf)
+        evicted = []
+        if self.memory_budget is None:
+            return evicted
+        while len(self._layers) > 1 and sum(self._sizes.values()) > self.memory_budget:
+            oldest = next(p for p in self._layers if p != path)
+            del self._layers[oldest]
+            del self._sizes[oldest]
+            self._checked_at.pop(oldest, None)
+            self._failed.pop(oldest, None)
+            evicted.append(oldest)
+            logger.info("Evicted %s to stay within the memory budget", oldest)
+        return evicted
+
+    def _released(self, evicted: list) -> None:
+        if self.on_evict is None:
+            return
+        for path in evicted:
+            try:
+                self.on_evict(path)
+            except Exception:
+                logger.exception("Releasing what was built from %s failed", path)
+
+    def _load_now(self, path: str):
+        version = layer_version(path)
+        gdf = self.loader(path)
+        evicted = []
+        with self._lock:
+            if path not in self._layers:
+                evicted = self._store(path, version, gdf)
+            self._checked_at[path] = time.monotonic()
+            version, gdf = self._layers[path]
+        self._released(evicted)
+        return gdf, version
+
+    def _reload_in_background(self, path: str, version: float) -> None:
+        with self._lock:
+            if self._reloading.get(path) == version or self._failed.get(path) == version:
+                return
+            self._reloading[path] = version
+        threading.Thread(target=self._reload, args=(path, version), daemon=True).start()
+
+    def _reload(self, path: str, version: float) -> None:
+        try:
+            gdf = self.loader(path)
+        except Exception:
+            # Usually a refresh still being copied in, which changes the
+            # version again; the same version is not read twice.
+            logger.exception("Reloading %s failed, keeping the previous version", path)
+            with self._lock:
+                if self._reloading.get(path) == version:
+                    self._reloading.pop(path)
+                    self._failed[path] = version
+            return
+        evicted = []
+        with self._lock:
+            # Only the latest requested version is kept, newer or older than
+            # the current one. The layer may have been evicted meanwhile; then
+            # it is not re-added.
+            if self._reloading.get(path) == version:
+                self._reloading.pop(path)
+                self._failed.pop(path, None)
+                if path in self._layers and version != self._layers[path][0]:
+                    evicted = self._store(path, version, gdf)
+        self._released(evicted)
+        logger.info("Reloaded %s (version %s)", path, version)
@@ -0,0 +1,376 @@
+import json
+import base64
+import numpy as np
+import folium
+from folium.template import Template
+from branca.element import MacroElement
+from folium.elements import JSCSSMixin
+from folium.plugins import MarkerCluster
+from folium.utilities import JsCode
+
+import topology
+
+
+# ----------------------------
+# TopoJSON-encoded GeoJson layer
+# ----------------------------
+class TopoGeoJson(JSCSSMixin, folium.GeoJson):
+    """``folium.GeoJson`` that ships its features as quantized TopoJSON.
+
+    Styling, tooltips and click handling behave as for ``folium.GeoJson``: the
+    features are decoded back to GeoJSON in the browser before being added to
+    the Leaflet layer.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        {%- if this.style %}
+        function {{ this.get_name() }}_styler(feature) {
+            switch({{ this.feature_identifier }}) {
+                {%- for style, ids_list in this.style_map.items() if not style == 'default' %}
+                {% for id_val in ids_list %}case {{ id_val|tojson }}: {% endfor %}
+                    return {{ style }};
+                {%- endfor %}
+                default:
+                    return {{ this.style_map['default'] }};
+            }
+        }
+        {%- endif %}
+        var {{ this.get_name() }}_topology = {{ this.topology|tojson }};
+        var {{ this.get_name() }} = L.geoJson(
+            topojson.feature(
+                {{ this.get_name() }}_topology,
+                {{ this.get_name() }}_topology.objects.layer
+            ),
+            {
+            {%- if this.smooth_factor is not none %}
+                smoothFactor: {{ this.smooth_factor|tojson }},
+            {%- endif %}
+            {%- if this.style %}
+                style: {{ this.get_name() }}_styler,
+            {%- endif %}
+                ...{{ this.options|tojavascript }}
+            }
+        );
+        {% endmacro %}
+        """
+    )
+
+    default_js = [
+        ("topojson", "https://cdnjs.cloudflare.com/ajax/libs/topojson/1.6.9/topojson.min.js"),
+    ]
+
+    def __init__(self, data, topology=None, quantization: int = 100_000, **kwargs):
+        super().__init__(data, **kwargs)
+        self._name = "TopoGeoJson"
+        if topology is None:
+            topology = encode_topology(self.data["features"], quantization)
+        self.topology = topology
+
+
+def encode_topology(features, quantization: int = 100_000) -> dict:
+    return topology.encode(features, "layer", quantization)
+
+
+# ----------------------------
+# Data-driven styling
+# ----------------------------
+# Same ramp as branca's LinearColormap(["yellow", "darkgreen"])
+RAMP_RGB = [(255, 255, 0), (0, 100, 0)]
+# Decrease -> no change -> increase, for season-over-season change
+DIVERGING_RGB = [(215, 48, 39), (255, 255, 191), (26, 152, 80)]
+_HEX = np.array([f"{i:02x}" for i in range(256)])
+
+
+def ramp_colors(values, vmin: float, vmax: float, missing: str = "grey", stops=RAMP_RGB) -> np.ndarray:
+    """Fill colour for every value in one vectorized pass over the column.
+
+    ``stops`` are RGB colours spread evenly between ``vmin`` and ``vmax``.
+    """
+    values = np.asarray(values, dtype=float)
+    t = np.nan_to_num(np.clip((values - vmin) / ((vmax - vmin) or 1.0), 0.0, 1.0))
+    stops = np.asarray(stops, dtype=float) / 255
+    pos = t * (len(stops) - 1)
+    segment = np.minimum(pos.astype(int), len(stops) - 2)
+    p = (pos - segment)[:, None]
+    # Interpolate in 0..1 and truncate like branca (int(x * 255.9999)), not round
+    rgb = (((1 - p) * stops[segment] + p * stops[segment + 1]) * 255.9999).astype(int)
+    colors = "#" + _HEX[rgb[:, 0]].astype(object) + _HEX[rgb[:, 1]] + _HEX[rgb[:, 2]]
+    return np.where(np.isnan(values), missing, colors.astype(str))
+
+
+def village_style() -> JsCode:
+    """One client-side rule reading the precomputed ``fill`` property.
+
+    The selected village is drawn by a separate overlay (``SELECTED_STYLE``),
+    so changing the selection never touches this layer.
+    """
+    return JsCode(
+        """function(feature) {
+            return {fillColor: feature.properties.fill || "grey", color: "black", weight: 1, fillOpacity: 0.6};
+        }"""
+    )
+
+
+def candidate_style() -> JsCode:
+    """Candidate site markers, filled by their precomputed catchment ``fill``."""
+    return JsCode(
+        """function(feature) {
+            return {fillColor: feature.properties.fill, color: "purple", weight: 2, fillOpacity: 0.9};
+        }"""
+    )
+
+
+SELECTED_STYLE = {"fillColor": "blue", "color": "black", "weight": 3, "fillOpacity": 0.8}
+
+
+def location_style(color: str) -> dict:
+    return {"fillColor": color, "color": "black", "weight": 2, "fillOpacity": 0.5}
+
+
+# ----------------------------
+# Layer payloads
+# ----------------------------
+def layer_payload(gdf, encoding: str = "GeoJSON") -> dict:
+    """Serialized form of a layer, worth caching per filter state.
+
+    ``bytes`` is the size of the JSON the layer is sent to the browser as.
+    Treat the result as read-only: it is shared between reruns and sessions.
+    """
+    text = gdf.to_json()
+    data = json.loads(text)
+    topo = encode_topology(data["features"]) if encoding == "TopoJSON" and data["features"] else None
+    size = len(text.encode("utf-8")) if topo is None else len(json.dumps(topo).encode("utf-8"))
+    return {"data": data, "topology": topo, "bytes": size}
+
+
+def geojson_layer(data, encoding: str = "GeoJSON", **kwargs):
+    """Build a village/location layer in the requested wire encoding.
+
+    ``data`` is a GeoDataFrame/GeoJSON, or a payload from ``layer_payload``.
+    """
+    topo = None
+    if isinstance(data, dict) and "topology" in data:
+        data, topo = data["data"], data["topology"]
+    if encoding == "TopoJSON":
+        return TopoGeoJson(data, topology=topo, **kwargs)
+    return folium.GeoJson(data, **kwargs)
+
+
+def raster_layer(png: bytes, bounds, opacity: float = 0.6, **kwargs):
+    """Image overlay of a PNG from ``raster_choropleth.render_choropleth``.
+
+    The image is already in web mercator, so Leaflet only stretches it.
+    """
+    url = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+    return folium.raster_layers.ImageOverlay(
+        url, bounds=bounds, opacity=opacity, mercator_project=False, **kwargs
+    )
+
+
+class ScriptDependencies(JSCSSMixin, MacroElement):
+    """Loads the scripts of the given layer classes with the base map.
+
+    Layers sent later through ``feature_group_to_add`` then find their
+    libraries already loaded, whichever mode the user switches to.
+    """
+
+    def __init__(self, *layer_classes):
+        super().__init__()
+        self._name = "ScriptDependencies"
+        self.default_js = [js for cls in layer_classes for js in getattr(cls, "default_js", [])]
+        self.default_css = [css for cls in layer_classes for css in getattr(cls, "default_css", [])]
+
+
+# ----------------------------
+# Colour ramp legend
+# ----------------------------
+class RampLegend(MacroElement):
+    """Legend control that follows the feature group it is added to.
+
+    Unlike branca's colormap it can live inside a ``FeatureGroup`` sent with
+    ``st_folium(feature_group_to_add=...)``: it is shown and removed together
+    with the group instead of being part of the base map.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = L.control({position: "topright"});
+        {{ this.get_name() }}.onAdd = function(map) {
+            var div = L.DomUtil.create("div", "ramp-legend");
+            div.innerHTML = {{ this.html|tojson }};
+            return div;
+        };
+        {{ this._parent.get_name() }}.on("add", function(e) {
+            {{ this.get_name() }}.addTo(e.target._map);
+        });
+        {{ this._parent.get_name() }}.on("remove", function() {
+            {{ this.get_name() }}.remove();
+        });
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, vmin: float, vmax: float, caption: str = "", stops=RAMP_RGB):
+        super().__init__()
+        self._name = "RampLegend"
+        gradient = ",".join("rgb(%d,%d,%d)" % tuple(rgb) for rgb in stops)
+        self.html = (
+            '<div style="background:white;padding:4px 8px;font-size:12px;">'
+            f"<div>{caption}</div>"
+            f'<div style="width:300px;height:10px;background:linear-gradient(to right,{gradient});"></div>'
+            '<div style="display:flex;justify-content:space-between;">'
+            f"<span>{vmin:.2f}</span><span>{vmax:.2f}</span></div></div>"
+        )
+
+
+# ----------------------------
+# Location centroids and labels
+# ----------------------------
+def centroid_features(gdf, colors) -> dict:
+    """Point FeatureCollection for the location centroids, built column-wise.
+
+    Uses the precomputed ``cx``/``cy`` columns; ``colors`` gives the marker
+    colour for every row.
+    """
+    lon = np.round(gdf["cx"].to_numpy(dtype=float), 6).tolist()
+    lat = np.round(gdf["cy"].to_numpy(dtype=float), 6).tolist()
+    ids = gdf["id"].astype(int).tolist()
+    acreage = gdf["acreage"].astype(object).where(gdf["acreage"].notna(), None).tolist()
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [x, y]},
+                "properties": {"id": i, "acreage": a, "color": c},
+            }
+            for x, y, i, a, c in zip(lon, lat, ids, acreage, np.asarray(colors).tolist())
+        ],
+    }
+
+
+class CentroidLayer(JSCSSMixin, MacroElement):
+    """Centroid markers with ID/acreage labels, from one point FeatureCollection.
+
+    Labels are permanent tooltips sharing the ``centroid-label`` CSS class and
+    are hidden below ``label_zoom``. With ``cluster`` the markers are grouped
+    with Leaflet.markercluster until ``label_zoom``, which also declutters the
+    labels of clustered points.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+        if (!document.getElementById("centroid-label-css")) {
+            var style = document.createElement("style");
+            style.id = "centroid-label-css";
+            style.innerHTML = {{ this.css|tojson }};
+            document.head.appendChild(style);
+        }
+        var {{ this.get_name() }} = {% if this.cluster %}L.markerClusterGroup({
+            disableClusteringAtZoom: {{ this.label_zoom }},
+            showCoverageOnHover: false
+        }){% else %}L.featureGroup(){% endif %};
+        L.geoJson({{ this.data|tojson }}, {
+            pointToLayer: function(feature, latlng) {
+                var p = feature.properties;
+                return L.circleMarker(latlng, {
+                    radius: {{ this.radius }}, color: p.color, fill: true,
+                    fillColor: p.color, fillOpacity: 0.8
+                })
+                .bindPopup("ID: " + p.id + ", Acreage: " + p.acreage + " ha")
+                .bindTooltip("ID: " + p.id + "<br>" + p.acreage + " ha", {
+                    permanent: true, direction: "top", className: "centroid-label"
+                });
+            }
+        }).eachLayer(function(layer) { {{ this.get_name() }}.addLayer(layer); });
+        var {{ this.get_name() }}_map = null;
+        function {{ this.get_name() }}_labels() {
+            var map = {{ this.get_name() }}_map;
+            var hide = map.getZoom() < {{ this.label_zoom }};
+            L.DomUtil[hide ? "addClass" : "removeClass"](map.getContainer(), "centroid-labels-hidden");
+        }
+        {{ this.get_name() }}.on("add", function(e) {
+            {{ this.get_name() }}_map = e.target._map;
+            {{ this.get_name() }}_map.on("zoomend", {{ this.get_name() }}_labels);
+            {{ this.get_name() }}_labels();
+        });
+        {{ this.get_name() }}.on("remove", function() {
+            {{ this.get_name() }}_map.off("zoomend", {{ this.get_name() }}_labels);
+        });
+        {{ this.get_name() }}.addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+        """
+    )
+
+    default_js = MarkerCluster.default_js
+    default_css = MarkerCluster.default_css
+
+    css = (
+        ".centroid-label{font-size:8px;font-weight:bold;color:black;text-align:center;"
+        "line-height:1;padding:1px 3px;background:white;border:none;border-radius:2px;"
+        "box-shadow:none;}"
+        ".centroid-label:before{display:none;}"
+        ".centroid-labels-hidden .centroid-label{display:none;}"
+    )
+
+    def __init__(self, data: dict, cluster: bool = True, label_zoom: int = 12, radius: int = 7):
+        super().__init__()
+        self._name = "CentroidLayer"
+        self.data = data
+        self.cluster = cluster
+        self.label_zoom = label_zoom
+        self.radius = radius
+
+
+# ----------------------------
+# Village vector tile layer
+# ----------------------------
+_TILE_OPTIONS = """{
+    maxNativeZoom: %(max_zoom)d,
+    interactive: true,
+    vectorTileLayerStyles: {
+        %(layer)s: function(properties, zoom) {
+            var tehsil = %(tehsil)s, allowed = %(allowed)s;
+            if ((tehsil !== null && properties.TEHSIL !== tehsil) ||
+                (allowed !== null && !allowed.has(properties.OBJECTID))) {
+                return {fill: false, stroke: false};
+            }
+            var v = properties.castor_ha, fillColor = "grey";
+            if (v !== undefined && v !== null) {
+                var t = Math.min(1, Math.max(0, (v - %(vmin)r) / (%(span)r)));
+                var lo = %(lo)s, hi = %(hi)s;
+                fillColor = "rgb(" + [0, 1, 2].map(function(i) {
+                    return Math.floor(((1 - t) * lo[i] + t * hi[i]) / 255 * 255.9999);
+                }).join(",") + ")";
+            }
+            return {fill: true, fillColor: fillColor, color: "black", weight: 1, fillOpacity: 0.6};
+        }
+    }
+}"""
+
+
+def village_tile_layer(url: str, layer: str, max_zoom: int, vmin: float, vmax: float,
+                       tehsil=None, allowed_ids=None):
+    """VectorGrid layer over pre-generated village tiles, coloured client-side.
+
+    ``allowed_ids`` (village OBJECTIDs) restricts the visible villages when a
+    location filter is active.
+    """
+    from folium.plugins import VectorGridProtobuf
+
+    allowed = "null" if allowed_ids is None else f"new Set({json.dumps(sorted(int(i) for i in allowed_ids))})"
+    options = _TILE_OPTIONS % {
+        "max_zoom": max_zoom,
+        "layer": layer,
+        "tehsil": json.dumps(tehsil),
+        "allowed": allowed,
+        "vmin": float(vmin),
+        "span": float(vmax - vmin) or 1.0,
+        "lo": json.dumps(RAMP_RGB[0]),
+        "hi": json.dumps(RAMP_RGB[1]),
+    }
+    return VectorGridProtobuf(url, name="Villages", options=options)
@@ -0,0 +1,86 @@
+import io
+import numpy as np
+import shapely
+from PIL import Image
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+
+# ----------------------------
+# Server-side choropleth image
+# ----------------------------
+# For district-wide views the village layer can be sent as one PNG instead of
+# thousands of vector polygons. All villages are burnt in by a single Agg draw
+# of one compound path each, in web mercator (the map's projection), so the
+# image lines up when Leaflet stretches it over its lon/lat bounds.
+RASTER_SIZE = 2048  # pixels along the longer side
+DPI = 72            # so line widths in points are pixels
+
+
+def _orient(parts):
+    # Exterior rings counter-clockwise and holes clockwise, so the nonzero
+    # fill rule leaves the holes empty
+    try:
+        return shapely.orient_polygons(parts)
+    except AttributeError:
+        # shapely < 2.1
+        return np.array([shapely.geometry.polygon.orient(p) for p in parts], dtype=object)
+
+
+def village_paths(geoms):
+    """One matplotlib path per non-empty (multi)polygon, and their positions in ``geoms``."""
+    parts, part_of = shapely.get_parts(np.asarray(geoms), return_index=True)
+    rings, ring_of = shapely.get_rings(_orient(parts), return_index=True)
+    coords, coord_of = shapely.get_coordinates(rings, return_index=True)
+    if not len(coords):
+        return [], np.empty(0, dtype=np.int64)
+
+    codes = np.full(len(coords), Path.LINETO, dtype=Path.code_type)
+    ring_starts = np.flatnonzero(np.r_[True, coord_of[1:] != coord_of[:-1]])
+    codes[ring_starts] = Path.MOVETO
+    codes[np.r_[ring_starts[1:], len(coords)] - 1] = Path.CLOSEPOLY
+
+    geom_of = part_of[ring_of[coord_of]]
+    geom_starts = np.flatnonzero(np.r_[True, geom_of[1:] != geom_of[:-1]])
+    paths = [
+        Path(v, c)
+        for v, c in zip(np.split(coords, geom_starts[1:]), np.split(codes, geom_starts[1:]))
+    ]
+    return paths, geom_of[geom_starts]
+
+
+def render_choropleth(gdf, colors, size: int = RASTER_SIZE, edge_color: str = "black",
+                      edge_width: float = 0.5):
+    """PNG of the villages of ``gdf`` (EPSG:4326) filled with ``colors``.
+
+    Returns the PNG bytes and the image bounds ``[[south, west], [north, east]]``.
+    Pixels outside every village are transparent.
+    """
+    mercator = gdf.geometry.to_crs(epsg=3857)
+    minx, miny, maxx, maxy = mercator.total_bounds
+    scale = size / max(maxx - minx, maxy - miny)
+    width, height = max(1, round((maxx - minx) * scale)), max(1, round((maxy - miny) * scale))
+
+    paths, present = village_paths(mercator.to_numpy())
+    fig = Figure(figsize=(width / DPI, height / DPI), dpi=DPI)
+    fig.patch.set_alpha(0)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    ax.set_xlim(minx, maxx)
+    ax.set_ylim(miny, maxy)
+    ax.add_collection(PathCollection(
+        paths,
+        facecolors=np.asarray(colors)[present],
+        edgecolors=edge_color,
+        linewidths=edge_width,
+        antialiaseds=False,
+        transform=ax.transData,
+    ))
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+
+    buf = io.BytesIO()
+    Image.fromarray(np.asarray(canvas.buffer_rgba())).save(buf, format="PNG")
+    west, south, east, north = gdf.geometry.total_bounds
+    return buf.getvalue(), [[float(south), float(west)], [float(north), float(east)]]
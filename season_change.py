@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+# ----------------------------
+# Season-over-season change
+# ----------------------------
+# Villages are aligned on OBJECTID. A key match only counts when the village
+# and tehsil names agree too; the remaining villages are matched by the
+# previous-season polygon containing their centre.
+KEY_COLUMN = "OBJECTID"
+MATCH_KEY, MATCH_GEOMETRY = "key", "geometry"
+
+
+def _names(df) -> np.ndarray:
+    village = df["VILLAGE"].fillna("").astype(str).str.strip().str.lower()
+    tehsil = df["TEHSIL"].fillna("").astype(str).str.strip().str.lower()
+    return (tehsil + "|" + village).to_numpy()
+
+
+def match_villages(gdf, previous):
+    """Row of ``previous`` matching every row of ``gdf`` (-1 if none), and how.
+
+    Both layers need the ``VILLAGE``/``TEHSIL`` columns; ``gdf`` its
+    ``cx``/``cy`` centres for the geometry fallback.
+    """
+    rows = np.full(len(gdf), -1, dtype=np.int64)
+    how = np.full(len(gdf), None, dtype=object)
+
+    if KEY_COLUMN in gdf and KEY_COLUMN in previous:
+        key_index = pd.Index(previous[KEY_COLUMN])
+        if key_index.is_unique:
+            found = key_index.get_indexer(gdf[KEY_COLUMN])
+            same_name = np.zeros(len(gdf), dtype=bool)
+            hit = found >= 0
+            same_name[hit] = _names(gdf)[hit] == _names(previous)[found[hit]]
+            rows[same_name] = found[same_name]
+            how[same_name] = MATCH_KEY
+
+    missing = np.flatnonzero(rows < 0)
+    if len(missing):
+        centres = gpd.points_from_xy(gdf["cx"].to_numpy()[missing], gdf["cy"].to_numpy()[missing])
+        point_pos, prev_pos = previous.sindex.query(centres, predicate="intersects")
+        # A centre on a shared edge hits two polygons: keep the first
+        point_pos, first = np.unique(point_pos, return_index=True)
+        rows[missing[point_pos]] = prev_pos[first]
+        how[missing[point_pos]] = MATCH_GEOMETRY
+    return rows, how
+
+
+def season_change(gdf, previous) -> pd.DataFrame:
+    """Previous castor_ha and its absolute / percentage change, row-aligned with ``gdf``."""
+    rows, how = match_villages(gdf, previous)
+    prev_values = previous["castor_ha"].to_numpy(dtype=float)
+    prev_ha = np.where(rows >= 0, prev_values[np.maximum(rows, 0)], np.nan)
+    current = gdf["castor_ha"].to_numpy(dtype=float)
+    change = current - prev_ha
+    pct = np.divide(change * 100.0, prev_ha, out=np.full(len(gdf), np.nan), where=prev_ha > 0)
+    return pd.DataFrame(
+        {"castor_ha_prev": prev_ha, "change_ha": change, "change_pct": pct, "match": how},
+        index=gdf.index,
+    )
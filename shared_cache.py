@@ -0,0 +1,144 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import numpy as np
+
+from layers import COMPILED_DIR
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Host-wide artefact cache
+# ----------------------------
+# Derived artefacts (join results, exports) are computed once per host under a
+# key derived from the data version; the other worker processes read them back
+# instead of computing them again. This saves compute, not memory: arrays are
+# memory-mapped read-only, but blobs are read into the calling worker, and the
+# layers themselves (GeoDataFrames) are still loaded by every worker. Entries
+# are written to a temporary directory and renamed into place, so readers
+# never see a partial entry; when two workers race, the first rename wins.
+CACHE_DIR = os.path.join(COMPILED_DIR, "cache")
+# Bump when the layout of cached entries changes
+FORMAT_VERSION = 1
+# Entries kept per name, most recently used first: enough for a few data
+# versions, or export selections, in use at once on the host
+KEEP_ENTRIES = 8
+
+
+def version_key(*parts) -> str:
+    """Stable key for ``parts`` (e.g. a data version tuple), the same in every process."""
+    text = json.dumps([FORMAT_VERSION, *parts], default=repr)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+
+
+def scoped_name(name: str, dataset: str) -> str:
+    """``name`` for one dataset (a catalog key), so datasets never evict each other."""
+    return f"{name}@{re.sub(r'[^0-9A-Za-z-]+', '_', dataset).strip('_')}"
+
+
+class SharedCache:
+    """Artefacts computed once for the worker processes of a host, one directory each.
+
+    Each name keeps its ``keep`` most recently used entries (by directory
+    mtime, refreshed on every read); older ones are removed when a new entry
+    is written. If the cache directory is not writable, artefacts are built
+    in memory and not shared.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, keep: int = KEEP_ENTRIES):
+        self.root = root
+        self.keep = keep
+
+    def _path(self, name: str, key: str) -> str:
+        return os.path.join(self.root, name, key)
+
+    def arrays(self, name: str, key: str, build) -> dict:
+        """``build()``'s dict of arrays, memory-mapped read-only from the shared entry."""
+        return self._get(name, key, build, _save_arrays, _load_arrays)
+
+    def blob(self, name: str, key: str, build) -> bytes:
+        """``build()``'s bytes (e.g. an export), read in full from the shared entry."""
+        return self._get(name, key, build, _save_blob, _load_blob)
+
+    def _get(self, name: str, key: str, build, save, load):
+        path = self._path(name, key)
+        try:
+            value = load(path)
+        except FileNotFoundError:
+            pass
+        else:
+            _touch(path)
+            return value
+        value = build()
+        if self._publish(name, key, lambda tmp: save(tmp, value)):
+            try:
+                return load(path)
+            except FileNotFoundError:
+                # Already replaced by a worker on newer data
+                pass
+        return value
+
+    def _publish(self, name: str, key: str, write) -> bool:
+        parent = os.path.join(self.root, name)
+        try:
+            os.makedirs(parent, exist_ok=True)
+            tmp = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+            write(tmp)
+            try:
+                os.rename(tmp, self._path(name, key))
+            except OSError:
+                # Another worker published the same entry first
+                shutil.rmtree(tmp, ignore_errors=True)
+        except OSError as exc:
+            logger.warning("Shared cache %s is not writable, keeping %s in memory: %s", self.root, name, exc)
+            return False
+        self._prune(name, key)
+        return True
+
+    def _prune(self, name: str, keep: str) -> None:
+        # Open memory maps stay valid after their files are unlinked
+        parent = os.path.join(self.root, name)
+        used = []
+        for entry in os.listdir(parent):
+            if entry == keep or entry.startswith(".tmp-"):
+                continue
+            try:
+                used.append((os.path.getmtime(os.path.join(parent, entry)), entry))
+            except FileNotFoundError:
+                # Pruned by another worker meanwhile
+                pass
+        for _, entry in sorted(used, reverse=True)[self.keep - 1:]:
+            shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+
+def _touch(path: str) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _save_arrays(path: str, arrays: dict) -> None:
+    for name, values in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(values))
+
+
+def _load_arrays(path: str) -> dict:
+    return {
+        f[:-len(".npy")]: np.load(os.path.join(path, f), mmap_mode="r")
+        for f in os.listdir(path) if f.endswith(".npy")
+    }
+
+
+def _save_blob(path: str, data: bytes) -> None:
+    with open(os.path.join(path, "blob"), "wb") as f:
+        f.write(data)
+
+
+def _load_blob(path: str) -> bytes:
+    with open(os.path.join(path, "blob"), "rb") as f:
+        return f.read()
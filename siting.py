@@ -0,0 +1,137 @@
+"""Propose new collection-centre sites that cover the most castor area.
+
+    python siting.py --k 50 --radius-km 10          # writes proposed_sites.csv
+    python siting.py --k 20 --radius-km 8 --out sites_2026.csv
+
+A village counts as covered when its centre lies within the radius of a site.
+Villages already covered by the existing sites in polygons.shp are excluded,
+then sites are chosen among the village centres by lazy greedy maximisation
+of newly covered castor_ha. The result is deterministic for a given data set.
+"""
+import heapq
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from scipy import sparse
+
+from catchments import build_catchments
+from layers import LOCATIONS_SHP, SUGGESTED_MAX_ID, VILLAGES_SHP, read_layer
+
+DEFAULT_K = 10
+DEFAULT_RADIUS_KM = 10.0
+
+
+# ----------------------------
+# Coverage sets
+# ----------------------------
+def centre_points(gdf):
+    """Point layer of the precomputed ``cx``/``cy`` centres of ``gdf``."""
+    return gpd.GeoDataFrame(
+        gdf.drop(columns=gdf.geometry.name),
+        geometry=gpd.points_from_xy(gdf["cx"], gdf["cy"]),
+        crs="EPSG:4326",
+    )
+
+
+def coverage_matrix(gdf, sites, radius_km: float) -> sparse.csr_matrix:
+    """Sparse ``sites x villages`` matrix, True where a village centre is in reach."""
+    pairs = build_catchments(gdf, sites, radius_km, methods=["centroid"])["pairs"]["centroid"]
+    within = pairs["distance_km"] <= radius_km
+    return sparse.csr_matrix(
+        (np.ones(int(within.sum()), dtype=bool), (pairs["point"][within], pairs["village"][within])),
+        shape=(len(sites), len(gdf)),
+    )
+
+
+def existing_coverage(gdf, existing, radius_km: float) -> np.ndarray:
+    """Boolean mask of the villages already within reach of an existing site."""
+    covered = np.zeros(len(gdf), dtype=bool)
+    if len(existing):
+        covered[coverage_matrix(gdf, centre_points(existing), radius_km).indices] = True
+    return covered
+
+
+# ----------------------------
+# Lazy greedy solver
+# ----------------------------
+def lazy_greedy(cover: sparse.csr_matrix, weights, k: int, covered=None):
+    """Pick up to ``k`` rows of ``cover`` maximising the weight of covered columns.
+
+    Coverage is submodular, so a row's gain can only shrink as sites are
+    added: stale gains in the heap are upper bounds and only the top entry
+    needs re-evaluating. Returns the chosen rows and their marginal gains.
+    Ties go to the lower row, so results are reproducible.
+    """
+    weights = np.nan_to_num(np.asarray(weights, dtype=float))
+    covered = np.zeros(cover.shape[1], dtype=bool) if covered is None else covered.copy()
+    indptr, indices = cover.indptr, cover.indices
+
+    def gain(row):
+        cols = indices[indptr[row]:indptr[row + 1]]
+        return float(weights[cols[~covered[cols]]].sum())
+
+    heap = [(-gain(row), row) for row in range(cover.shape[0])]
+    heapq.heapify(heap)
+    chosen, gains = [], []
+    while heap and len(chosen) < k:
+        _, row = heapq.heappop(heap)
+        current = gain(row)
+        if heap and (-current, row) > heap[0]:
+            heapq.heappush(heap, (-current, row))
+            continue
+        if current <= 0:
+            break
+        chosen.append(row)
+        gains.append(current)
+        covered[indices[indptr[row]:indptr[row + 1]]] = True
+    return chosen, gains
+
+
+def propose_sites(gdf, existing, k: int = DEFAULT_K, radius_km: float = DEFAULT_RADIUS_KM) -> pd.DataFrame:
+    """Up to ``k`` village-centre sites, in the order the solver picked them.
+
+    ``existing`` are the current sites; their ``cx``/``cy`` centres are used.
+    """
+    sites = centre_points(gdf)
+    cover = coverage_matrix(gdf, sites, radius_km)
+    covered = existing_coverage(gdf, existing, radius_km)
+    chosen, gains = lazy_greedy(cover, gdf["castor_ha"], k, covered)
+
+    base = float(np.nan_to_num(gdf["castor_ha"].to_numpy(dtype=float))[covered].sum())
+    picked = gdf.iloc[chosen]
+    return pd.DataFrame({
+        "rank": np.arange(1, len(chosen) + 1),
+        "VILLAGE": picked["VILLAGE"].to_numpy(),
+        "TEHSIL": picked["TEHSIL"].to_numpy(),
+        "lat": picked["cy"].to_numpy(),
+        "lon": picked["cx"].to_numpy(),
+        "castor_ha_gain": gains,
+        "castor_ha_covered": base + np.cumsum(gains),
+    })
+
+
+def existing_sites(loc_gdf):
+    return loc_gdf[loc_gdf["id"] > SUGGESTED_MAX_ID]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--villages", default=VILLAGES_SHP, help="village layer")
+    parser.add_argument("--locations", default=LOCATIONS_SHP, help="layer with the existing sites")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="number of new sites")
+    parser.add_argument("--radius-km", type=float, default=DEFAULT_RADIUS_KM, help="coverage radius")
+    parser.add_argument("--out", default="proposed_sites.csv", help="CSV to write")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    gdf = read_layer(args.villages)
+    sites = propose_sites(gdf, existing_sites(read_layer(args.locations)), args.k, args.radius_km)
+    sites.to_csv(args.out, index=False)
+    covered = sites["castor_ha_covered"].iloc[-1] if len(sites) else 0.0
+    print(f"{len(sites)} sites, {covered:.1f} ha covered -> {args.out} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
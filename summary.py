@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# Per-data-version summary
+# ----------------------------
+# Everything the sidebar and map setup need about the whole layer, computed
+# once when the data changes so a rerun only does dictionary lookups.
+ALL = "All"
+
+
+def frame_stats(df) -> dict:
+    """Centre, bounds and castor_ha range of a village frame.
+
+    Uses the precomputed ``cx``/``cy`` and ``minx``..``maxy`` columns.
+    An empty frame gets no centre/bounds and the 0..1 range of an empty
+    colour scale.
+    """
+    ha = df["castor_ha"].dropna()
+    return {
+        "count": len(df),
+        "center": [float(df["cy"].mean()), float(df["cx"].mean())] if len(df) else None,
+        "bounds": (
+            [float(df["minx"].min()), float(df["miny"].min()), float(df["maxx"].max()), float(df["maxy"].max())]
+            if len(df) else None
+        ),
+        "castor_ha_min": float(ha.min()) if len(ha) else 0.0,
+        "castor_ha_max": float(ha.max()) if len(ha) else 1.0,
+        "castor_ha_sum": float(ha.sum()),
+    }
+
+
+def _grouped_stats(gdf) -> dict:
+    grouped = gdf.groupby("TEHSIL", sort=True)
+    agg = pd.DataFrame({
+        "count": grouped.size(),
+        "cx": grouped["cx"].mean(),
+        "cy": grouped["cy"].mean(),
+        "minx": grouped["minx"].min(),
+        "miny": grouped["miny"].min(),
+        "maxx": grouped["maxx"].max(),
+        "maxy": grouped["maxy"].max(),
+        "ha_min": grouped["castor_ha"].min(),
+        "ha_max": grouped["castor_ha"].max(),
+        "ha_sum": grouped["castor_ha"].sum(),
+    })
+    stats = {}
+    for tehsil, row in agg.iterrows():
+        has_ha = not np.isnan(row["ha_min"])
+        stats[tehsil] = {
+            "count": int(row["count"]),
+            "center": [float(row["cy"]), float(row["cx"])],
+            "bounds": [float(row["minx"]), float(row["miny"]), float(row["maxx"]), float(row["maxy"])],
+            "castor_ha_min": float(row["ha_min"]) if has_ha else 0.0,
+            "castor_ha_max": float(row["ha_max"]) if has_ha else 1.0,
+            "castor_ha_sum": float(row["ha_sum"]),
+        }
+    return stats
+
+
+def build_summary(gdf, loc_gdf) -> dict:
+    """Filter options and aggregates for the village and location layers.
+
+    Keys:
+      ``tehsils``         sorted tehsil names
+      ``villages``        tehsil (or ``"All"``) -> sorted village names
+      ``location_ids``    sorted location ids
+      ``scopes``          tehsil (or ``"All"``) -> ``frame_stats`` dict
+      ``location_bounds`` location id -> [minx, miny, maxx, maxy]
+      ``tehsil_totals``   DataFrame of villages and castor ha per tehsil
+    """
+    named = gdf.dropna(subset=["VILLAGE"])
+    villages = {ALL: sorted(named["VILLAGE"].unique().tolist())}
+    for tehsil, names in named.groupby("TEHSIL", sort=True)["VILLAGE"]:
+        villages[tehsil] = sorted(names.unique().tolist())
+
+    scopes = {ALL: frame_stats(gdf)}
+    scopes.update(_grouped_stats(gdf))
+
+    bounds = loc_gdf[["minx", "miny", "maxx", "maxy"]].to_numpy(dtype=float).tolist()
+    location_bounds = dict(zip(loc_gdf["id"].astype(int).tolist(), bounds))
+
+    tehsils = sorted(gdf["TEHSIL"].dropna().unique().tolist())
+    tehsil_totals = pd.DataFrame(
+        {
+            "Tehsil": tehsils,
+            "Villages": [scopes[t]["count"] for t in tehsils],
+            "Castor Area (ha)": [scopes[t]["castor_ha_sum"] for t in tehsils],
+        }
+    )
+
+    return {
+        "tehsils": tehsils,
+        "villages": villages,
+        "location_ids": sorted(location_bounds),
+        "scopes": scopes,
+        "location_bounds": location_bounds,
+        "tehsil_totals": tehsil_totals,
+    }
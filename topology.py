@@ -0,0 +1,147 @@
+import numpy as np
+
+# ----------------------------
+# GeoJSON -> quantized TopoJSON
+# ----------------------------
+# Village boundaries are shared by neighbouring polygons. Cutting every ring at
+# the points where neighbourhoods change and storing each resulting arc once
+# (delta-encoded on an integer grid) removes the duplicated edges and most of
+# the float digits from the payload.
+
+
+def _polygons(geometry):
+    if geometry is None:
+        return "Polygon", []
+    if geometry["type"] == "Polygon":
+        return "Polygon", [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return "MultiPolygon", geometry["coordinates"]
+    raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+
+def _quantize(features, quantization):
+    """Integer grid transform and, per feature, polygons -> rings of point ids."""
+    coords = [
+        np.asarray(ring, dtype=float)[:, :2]
+        for feature in features
+        for polygon in _polygons(feature.get("geometry"))[1]
+        for ring in polygon
+    ]
+    if coords:
+        stacked = np.concatenate(coords)
+        x0, y0 = stacked.min(axis=0)
+        x1, y1 = stacked.max(axis=0)
+    else:
+        x0 = y0 = x1 = y1 = 0.0
+    sx = (x1 - x0) / (quantization - 1) or 1.0
+    sy = (y1 - y0) / (quantization - 1) or 1.0
+
+    rings = iter(coords)
+    shapes = []
+    for feature in features:
+        geom_type, polygons = _polygons(feature.get("geometry"))
+        quantized = []
+        for polygon in polygons:
+            qrings = []
+            for _ in polygon:
+                q = np.rint((next(rings) - (x0, y0)) / (sx, sy)).astype(np.int64)
+                # Drop the closing point and any points collapsed by quantization
+                keep = np.any(q != np.roll(q, 1, axis=0), axis=1)
+                q = q[keep]
+                if len(q) >= 3:
+                    qrings.append(q[:, 0] * quantization + q[:, 1])
+            if qrings:
+                quantized.append(qrings)
+        shapes.append((geom_type, quantized))
+    return {"scale": [float(sx), float(sy)], "translate": [float(x0), float(y0)]}, shapes
+
+
+def _junctions(rings) -> np.ndarray:
+    """Point ids whose neighbours differ between the rings they appear in."""
+    if not rings:
+        return np.empty(0, dtype=np.int64)
+    points = np.concatenate(rings)
+    prev = np.concatenate([np.roll(r, 1) for r in rings])
+    nxt = np.concatenate([np.roll(r, -1) for r in rings])
+    pairs = np.stack([points, np.minimum(prev, nxt), np.maximum(prev, nxt)], axis=1)
+    pairs = np.unique(pairs, axis=0)
+    ids, counts = np.unique(pairs[:, 0], return_counts=True)
+    return ids[counts > 1]
+
+
+def _cut(ring, at_junction):
+    """Split a ring of point ids into arcs that start and end at junctions.
+
+    ``at_junction`` flags the points of the ring that are junctions.
+    """
+    cuts = np.flatnonzero(at_junction)
+    if len(cuts) == 0:
+        # Closed ring without junctions: rotate to a canonical start for de-duplication
+        start = int(np.argmin(ring))
+        ring = np.roll(ring, -start)
+        return [np.append(ring, ring[0])]
+    ring = np.roll(ring, -cuts[0])
+    cuts = cuts - cuts[0]
+    bounds = list(cuts) + [len(ring)]
+    closed = np.append(ring, ring[0])
+    return [closed[a:b + 1] for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def encode(features, object_name: str = "layer", quantization: int = 100_000) -> dict:
+    """Encode GeoJSON polygon features as a TopoJSON topology.
+
+    Feature ``id`` and ``properties`` are carried over unchanged, so client
+    code decoding with ``topojson.feature`` sees the same features.
+    """
+    transform, shapes = _quantize(features, quantization)
+    all_rings = [ring for _, polygons in shapes for polygon in polygons for ring in polygon]
+    junctions = _junctions(all_rings)
+    # One membership test over every point: a test per ring would scale with
+    # the number of rings times the number of junctions
+    at_junction = iter(np.split(
+        np.isin(np.concatenate(all_rings), junctions) if all_rings else np.empty(0, dtype=bool),
+        np.cumsum([len(ring) for ring in all_rings])[:-1],
+    ))
+
+    arcs, arc_index = [], {}
+
+    def arc_id(points):
+        key = points.tobytes()
+        if key in arc_index:
+            return arc_index[key]
+        reverse = points[::-1].tobytes()
+        if reverse in arc_index:
+            return ~arc_index[reverse]
+        arc_index[key] = len(arcs)
+        arcs.append(points)
+        return arc_index[key]
+
+    geometries = []
+    for feature, (geom_type, polygons) in zip(features, shapes):
+        encoded = [
+            [[arc_id(arc) for arc in _cut(ring, next(at_junction))] for ring in polygon]
+            for polygon in polygons
+        ]
+        geometry = {"properties": feature.get("properties") or {}}
+        if "id" in feature:
+            geometry["id"] = feature["id"]
+        if not encoded:
+            geometry["type"] = None
+        elif geom_type == "Polygon" and len(encoded) == 1:
+            geometry.update(type="Polygon", arcs=encoded[0])
+        else:
+            geometry.update(type="MultiPolygon", arcs=encoded)
+        geometries.append(geometry)
+
+    encoded_arcs = []
+    for points in arcs:
+        xy = np.stack([points // quantization, points % quantization], axis=1)
+        xy[1:] = np.diff(xy, axis=0)
+        encoded_arcs.append(xy.tolist())
+
+    return {
+        "type": "Topology",
+        "transform": transform,
+        "objects": {object_name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": encoded_arcs,
+    }
@@ -0,0 +1,226 @@
+"""Pre-generate village vector tiles for offline serving.
+
+    python vector_tiles.py   # builds compiled/villages.mbtiles and unpacks it
+                             # into static/tiles/villages/{z}/{x}/{y}.pbf
+
+Tiles carry the OBJECTID, VILLAGE, TEHSIL and castor_ha attributes and use the
+simplification level matching their zoom (geometry_levels.py). Streamlit
+serves the unpacked directory through static file serving
+(.streamlit/config.toml), so the map fetches only the visible tiles.
+"""
+import os
+import math
+import gzip
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import shapely
+import geopandas as gpd
+
+from geometry_levels import level_column, level_for_zoom
+from layers import COMPILED_DIR, VILLAGES_SHP, read_layer, source_version
+
+TILE_LAYER = "villages"
+TILE_ATTRIBUTES = ["OBJECTID", "VILLAGE", "TEHSIL", "castor_ha"]
+MBTILES_PATH = os.path.join(COMPILED_DIR, "villages.mbtiles")
+TILE_DIR = os.path.join("static", "tiles", "villages")
+TILE_URL = "app/static/tiles/villages/{z}/{x}/{y}.pbf"
+MIN_ZOOM, MAX_ZOOM = 7, 14
+EXTENT = 4096
+BUFFER = 64  # tile units of overlap, so strokes are not cut at tile edges
+
+WORLD = 2 * math.pi * 6378137.0
+
+
+def _mapbox_vector_tile():
+    try:
+        import mapbox_vector_tile
+    except ImportError as exc:
+        raise ImportError(
+            "Vector tile generation needs the optional 'mapbox-vector-tile' package "
+            "(pip install mapbox-vector-tile)"
+        ) from exc
+    return mapbox_vector_tile
+
+
+# ----------------------------
+# Tile grid (XYZ, web mercator)
+# ----------------------------
+def tile_bounds(z: int, x: int, y: int):
+    size = WORLD / 2 ** z
+    minx = -WORLD / 2 + x * size
+    maxy = WORLD / 2 - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tile_range(bounds, z: int):
+    """XYZ tile columns and rows covering mercator ``bounds`` at zoom ``z``."""
+    minx, miny, maxx, maxy = bounds
+    size = WORLD / 2 ** z
+    x0 = int((minx + WORLD / 2) // size)
+    x1 = int((maxx + WORLD / 2) // size)
+    y0 = int((WORLD / 2 - maxy) // size)
+    y1 = int((WORLD / 2 - miny) // size)
+    return range(x0, x1 + 1), range(y0, y1 + 1)
+
+
+# ----------------------------
+# Tile generation
+# ----------------------------
+def generate_tiles(gdf, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM):
+    """Yield ``(z, x, y, pbf_bytes)`` for every non-empty tile of the village layer."""
+    mvt = _mapbox_vector_tile()
+    properties = gdf[TILE_ATTRIBUTES].astype(object).where(gdf[TILE_ATTRIBUTES].notna(), None)
+    properties = properties.to_dict("records")
+
+    mercator = gdf.geometry.to_crs(epsg=3857)
+    levels = {"geometry": mercator.to_numpy()}
+    for z in range(min_zoom, max_zoom + 1):
+        column = level_column(level_for_zoom(z))
+        if column not in levels and column in gdf:
+            levels[column] = gpd.GeoSeries(gdf[column], crs=gdf.crs).to_crs(epsg=3857).to_numpy()
+    tree = shapely.STRtree(levels["geometry"])
+    layer_bounds = mercator.total_bounds
+
+    for z in range(min_zoom, max_zoom + 1):
+        geoms = levels.get(level_column(level_for_zoom(z)), levels["geometry"])
+        xs, ys = tile_range(layer_bounds, z)
+        for x in xs:
+            for y in ys:
+                bounds = tile_bounds(z, x, y)
+                pad = BUFFER / EXTENT * (bounds[2] - bounds[0])
+                padded = (bounds[0] - pad, bounds[1] - pad, bounds[2] + pad, bounds[3] + pad)
+                rows = tree.query(shapely.box(*padded), predicate="intersects")
+                if len(rows) == 0:
+                    continue
+                clipped = shapely.clip_by_rect(geoms[rows], *padded)
+                features = [
+                    {"geometry": geom, "properties": properties[row]}
+                    for row, geom in zip(rows, clipped)
+                    if not geom.is_empty
+                ]
+                if not features:
+                    continue
+                data = mvt.encode(
+                    {"name": TILE_LAYER, "features": features},
+                    default_options={"quantize_bounds": bounds, "extents": EXTENT},
+                )
+                yield z, x, y, data
+
+
+# ----------------------------
+# MBTiles archive
+# ----------------------------
+def write_mbtiles(path: str, tiles, metadata: dict) -> int:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    con = sqlite3.connect(tmp)
+    con.executescript(
+        """
+        CREATE TABLE metadata (name TEXT, value TEXT);
+        CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+        CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);
+        """
+    )
+    con.executemany("INSERT INTO metadata VALUES (?, ?)", [(k, str(v)) for k, v in metadata.items()])
+    count = 0
+    for z, x, y, data in tiles:
+        # MBTiles rows are TMS (y flipped); tiles are stored gzipped
+        con.execute(
+            "INSERT INTO tiles VALUES (?, ?, ?, ?)",
+            (z, x, 2 ** z - 1 - y, gzip.compress(data)),
+        )
+        count += 1
+    con.commit()
+    con.close()
+    os.replace(tmp, path)
+    return count
+
+
+def read_tile_metadata(tile_dir: str = TILE_DIR) -> dict:
+    try:
+        with open(os.path.join(tile_dir, "metadata.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def tiles_are_current(metadata: dict, version: float) -> bool:
+    """Whether a tile set was built from source ``version`` with the current attributes."""
+    return (
+        metadata.get("attributes") == ",".join(TILE_ATTRIBUTES)
+        and float(metadata.get("source_version", 0.0)) == version
+    )
+
+
+def export_tile_dir(mbtiles_path: str = MBTILES_PATH, tile_dir: str = TILE_DIR) -> None:
+    """Unpack an MBTiles archive into a ``{z}/{x}/{y}.pbf`` directory tree."""
+    tmp = tile_dir + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    con = sqlite3.connect(mbtiles_path)
+    for z, x, tms_y, data in con.execute("SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles"):
+        out = os.path.join(tmp, str(z), str(x))
+        os.makedirs(out, exist_ok=True)
+        with open(os.path.join(out, f"{2 ** z - 1 - tms_y}.pbf"), "wb") as f:
+            f.write(gzip.decompress(data))
+    metadata = dict(con.execute("SELECT name, value FROM metadata"))
+    con.close()
+    os.makedirs(tmp, exist_ok=True)
+    with open(os.path.join(tmp, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    # Swap the new tree in so the app never serves a half-written tile set
+    old = tile_dir + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(tile_dir):
+        os.replace(tile_dir, old)
+    os.replace(tmp, tile_dir)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def build(shp_path: str = VILLAGES_SHP, mbtiles_path: str = MBTILES_PATH,
+          min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM) -> int:
+    gdf = read_layer(shp_path)
+    ha = gdf["castor_ha"].dropna()
+    minx, miny, maxx, maxy = gdf.total_bounds
+    metadata = {
+        "name": TILE_LAYER,
+        "format": "pbf",
+        "minzoom": min_zoom,
+        "maxzoom": max_zoom,
+        "bounds": f"{minx},{miny},{maxx},{maxy}",
+        "center": f"{(minx + maxx) / 2},{(miny + maxy) / 2},{min_zoom}",
+        "json": json.dumps({"vector_layers": [
+            {"id": TILE_LAYER, "fields": {
+                "OBJECTID": "Number", "VILLAGE": "String", "TEHSIL": "String", "castor_ha": "Number",
+            }}
+        ]}),
+        "attributes": ",".join(TILE_ATTRIBUTES),
+        "castor_ha_min": float(ha.min()) if len(ha) else 0.0,
+        "castor_ha_max": float(ha.max()) if len(ha) else 1.0,
+        "source_version": source_version(shp_path),
+    }
+    return write_mbtiles(mbtiles_path, generate_tiles(gdf, min_zoom, max_zoom), metadata)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--layer", default=VILLAGES_SHP, help="village shapefile")
+    parser.add_argument("--mbtiles", default=MBTILES_PATH, help="MBTiles archive to write")
+    parser.add_argument("--tile-dir", default=TILE_DIR, help="directory served by Streamlit")
+    parser.add_argument("--min-zoom", type=int, default=MIN_ZOOM)
+    parser.add_argument("--max-zoom", type=int, default=MAX_ZOOM)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = build(args.layer, args.mbtiles, args.min_zoom, args.max_zoom)
+    export_tile_dir(args.mbtiles, args.tile_dir)
+    print(f"{count} tiles -> {args.mbtiles}, {args.tile_dir} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
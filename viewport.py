@@ -0,0 +1,68 @@
+import math
+import numpy as np
+import shapely
+
+from vector_tiles import MAX_ZOOM, WORLD, tile_bounds, tile_range
+
+# ----------------------------
+# Viewport culling
+# ----------------------------
+# The village layer can be limited to what the map shows. A viewport is
+# snapped to the XYZ tiles covering it, one zoom level coarser than the map
+# (tiles of 512 screen pixels), and the villages of each tile are looked up
+# once per data version: panning within, or back to, the same tiles reuses
+# the lookups and the serialized layer.
+TILE_ZOOM_OFFSET = 1
+MAX_LATITUDE = 85.0511
+
+
+def map_view(state):
+    """``(bounds, zoom)`` of the map state returned by st_folium, or None.
+
+    ``bounds`` are (min lon, min lat, max lon, max lat).
+    """
+    if not state or not state.get("bounds") or state.get("zoom") is None:
+        return None
+    sw, ne = state["bounds"].get("_southWest"), state["bounds"].get("_northEast")
+    if not sw or not ne or None in (sw.get("lng"), sw.get("lat"), ne.get("lng"), ne.get("lat")):
+        return None
+    return (sw["lng"], sw["lat"], ne["lng"], ne["lat"]), state["zoom"]
+
+
+def _mercator(lon: float, lat: float):
+    lon = min(max(lon, -180.0), 180.0)
+    lat = min(max(lat, -MAX_LATITUDE), MAX_LATITUDE)
+    x = WORLD / 360.0 * lon
+    y = WORLD / (2 * math.pi) * math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+    return x, y
+
+
+def _lonlat(x: float, y: float):
+    lon = x * 360.0 / WORLD
+    lat = math.degrees(2 * math.atan(math.exp(y * 2 * math.pi / WORLD)) - math.pi / 2)
+    return lon, lat
+
+
+def viewport_tiles(bounds, zoom) -> tuple:
+    """``(z, x, y)`` of the tiles covering lon/lat ``bounds`` at map ``zoom``."""
+    z = min(max(int(zoom) - TILE_ZOOM_OFFSET, 0), MAX_ZOOM)
+    minx, miny = _mercator(bounds[0], bounds[1])
+    maxx, maxy = _mercator(bounds[2], bounds[3])
+    xs, ys = tile_range((minx, miny, maxx, maxy), z)
+    last = 2 ** z - 1
+    return tuple(
+        (z, x, y)
+        for x in range(max(xs.start, 0), min(xs.stop - 1, last) + 1)
+        for y in range(max(ys.start, 0), min(ys.stop - 1, last) + 1)
+    )
+
+
+def tile_box(z: int, x: int, y: int):
+    """Tile outline in EPSG:4326."""
+    minx, miny, maxx, maxy = tile_bounds(z, x, y)
+    return shapely.box(*_lonlat(minx, miny), *_lonlat(maxx, maxy))
+
+
+def tile_rows(gdf, z: int, x: int, y: int) -> np.ndarray:
+    """Sorted positions of the rows of ``gdf`` intersecting a tile."""
+    return np.sort(gdf.sindex.query(tile_box(z, x, y), predicate="intersects"))
@@ -0,0 +1,124 @@
+import re
+import bisect
+from collections import defaultdict
+import numpy as np
+import shapely
+
+# ----------------------------
+# Click -> village
+# ----------------------------
+class ClickLookup:
+    """Village under a clicked point, from an STRtree over prepared geometries.
+
+    Works whichever way the village layer is drawn (embedded, culled to the
+    viewport or as vector tiles), since nothing is read back from the browser.
+    """
+
+    def __init__(self, gdf):
+        self.geoms = gdf.geometry.to_numpy().copy()
+        shapely.prepare(self.geoms)
+        self.tree = shapely.STRtree(self.geoms)
+
+    def village_at(self, lon: float, lat: float, mask=None):
+        """Position of the village containing the point, or None.
+
+        With a boolean ``mask`` only those villages are considered. A point on
+        a shared edge goes to the lower position.
+        """
+        candidates = np.sort(self.tree.query(shapely.Point(lon, lat)))
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        hits = candidates[shapely.contains_xy(self.geoms[candidates], lon, lat)]
+        if not len(hits):
+            # On the boundary itself
+            hits = candidates[shapely.intersects_xy(self.geoms[candidates], lon, lat)]
+        return int(hits[0]) if len(hits) else None
+
+
+# ----------------------------
+# Village name search
+# ----------------------------
+def normalize(name) -> str:
+    return re.sub(r"[^0-9a-z]+", " ", str(name).lower()).strip()
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class VillageSearch:
+    """Type-ahead search over village names.
+
+    Names starting with the query come first, then names with a word starting
+    with it, then similar names by shared trigrams (for misspellings).
+    Results are unique names, optionally within one tehsil.
+    """
+
+    MIN_SIMILARITY = 0.3
+
+    def __init__(self, villages, tehsils):
+        self.names = np.asarray(villages, dtype=object)
+        self.tehsils = np.asarray(tehsils, dtype=object)
+        self.keys = [normalize(name) for name in self.names]
+        self._order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self._sorted = [self.keys[i] for i in self._order]
+        # Word starts (e.g. "kheda" in "moti kheda") for the second tier
+        words = sorted(
+            (word, i) for i, key in enumerate(self.keys) for word in key.split()[1:]
+        )
+        self._words = [word for word, _ in words]
+        self._word_rows = [i for _, i in words]
+        postings = defaultdict(list)
+        self._gram_counts = np.zeros(len(self.keys), dtype=np.int64)
+        for i, key in enumerate(self.keys):
+            grams = _trigrams(key)
+            self._gram_counts[i] = len(grams)
+            for gram in grams:
+                postings[gram].append(i)
+        self._postings = {gram: np.asarray(rows, dtype=np.int64) for gram, rows in postings.items()}
+        by_name = defaultdict(list)
+        for i, name in enumerate(self.names):
+            by_name[name].append(i)
+        self._positions = {name: np.asarray(rows, dtype=np.int64) for name, rows in by_name.items()}
+
+    def positions(self, name) -> np.ndarray:
+        """Positions of the villages named exactly ``name``."""
+        return self._positions.get(name, np.empty(0, dtype=np.int64))
+
+    def _prefixed(self, sorted_keys, rows, query: str) -> list:
+        start = bisect.bisect_left(sorted_keys, query)
+        stop = bisect.bisect_left(sorted_keys, query + "\uffff")
+        return [rows[i] for i in range(start, stop)]
+
+    def _similar(self, query: str) -> list:
+        grams = _trigrams(query)
+        lists = [self._postings[g] for g in grams if g in self._postings]
+        if not lists:
+            return []
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.keys))
+        rows = np.flatnonzero(shared)
+        score = shared[rows] / (len(grams) + self._gram_counts[rows] - shared[rows])
+        keep = score >= self.MIN_SIMILARITY
+        rows, score = rows[keep], score[keep]
+        return rows[np.lexsort((rows, -score))].tolist()
+
+    def search(self, query: str, tehsil=None, limit: int = 20) -> list:
+        query = normalize(query)
+        if not query:
+            return []
+        results, seen = [], set()
+        for rows in (
+            self._prefixed(self._sorted, self._order, query),
+            self._prefixed(self._words, self._word_rows, query),
+            self._similar(query),
+        ):
+            for row in rows:
+                name = self.names[row]
+                if (tehsil is not None and self.tehsils[row] != tehsil) or name in seen:
+                    continue
+                seen.add(name)
+                results.append(name)
+                if len(results) >= limit:
+                    return results
+        return results
@@ -0,0 +1,170 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Background warm-up
+# ----------------------------
+# A plan turns a data version into the tasks that precompute its artefacts,
+# ``(name, callable)`` pairs named "kind/key" (e.g. "tehsil/Deesa"). The tasks
+# fill the app's own in-process caches, so they run on threads rather than
+# processes; the heavy parts (GEOS, numpy, zlib) release the GIL.
+
+
+class Warmup:
+    """Runs a plan's tasks on a small thread pool, once per data version.
+
+    The worker is ready once one version has been warmed. A later version is
+    warmed in the background without the worker turning unready, since the
+    previous layers keep being served meanwhile; only a plan that fails before
+    the first warm version keeps it unready. A version whose cached artefacts
+    were dropped is forgotten (``reset``) and warmed again.
+    """
+
+    def __init__(self, max_workers: int = 2, interval: float = 5.0):
+        self.max_workers = max_workers
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pool = None
+        self._watching = False
+        self._generation = 0
+        self.version = None
+        self.state = "cold"   # cold | warming | warm | failed
+        self.warmed = None    # last fully warmed version
+        self.error = None
+        self.tasks = {}       # name -> pending | running | done | failed
+        self.started = None
+        self.seconds = None
+
+    def schedule(self, version, plan) -> bool:
+        """Warm ``version`` with ``plan(version)`` unless it is already warming or warm."""
+        with self._lock:
+            if version == self.version and self.state != "failed":
+                return False
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="warmup")
+            self._generation += 1
+            generation = self._generation
+            self.version = version
+            self.state = "warming"
+            self.error = None
+            self.tasks = {}
+            self.started = time.monotonic()
+            self.seconds = None
+        logger.info("Warming up %s", version)
+        self._pool.submit(self._run_plan, generation, version, plan)
+        return True
+
+    def watch(self, version_fn, plan) -> None:
+        """Check ``version_fn()`` every ``interval`` seconds on a daemon thread
+        and warm each new version. Only the first call starts the thread."""
+        with self._lock:
+            if self._watching:
+                return
+            self._watching = True
+
+        def loop():
+            while True:
+                try:
+                    self.schedule(version_fn(), plan)
+                except Exception as exc:
+                    logger.exception("Warm-up version check failed")
+                    self._fail(self._generation, exc)
+                time.sleep(self.interval)
+
+        threading.Thread(target=loop, name="warmup-watch", daemon=True).start()
+
+    def reset(self, version) -> None:
+        """Forget ``version`` after its cached artefacts were dropped.
+
+        The worker is unready until the watch has warmed it again.
+        """
+        with self._lock:
+            if version not in (self.version, self.warmed):
+                return
+            if version == self.warmed:
+                self.warmed = None
+            if version == self.version:
+                self._generation += 1
+                self.version = None
+                self.state = "cold"
+                self.tasks = {}
+                self.seconds = None
+        logger.info("Warm-up of %s reset, its caches were dropped", version)
+
+    def _run_plan(self, generation: int, version, plan) -> None:
+        try:
+            with stage("warmup_plan"):
+                tasks = list(plan(version))
+        except Exception as exc:
+            logger.exception("Warm-up plan for %s failed", version)
+            self._fail(generation, exc)
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.tasks = {name: "pending" for name, _ in tasks}
+        if not tasks:
+            self._finish(generation)
+        for name, task in tasks:
+            self._pool.submit(self._run_task, generation, name, task)
+
+    def _run_task(self, generation: int, name: str, task) -> None:
+        with self._lock:
+            if generation != self._generation:
+                # Superseded by a newer version
+                return
+            self.tasks[name] = "running"
+        try:
+            with stage("warmup_" + name.partition("/")[0]):
+                task()
+            result = "done"
+        except Exception:
+            logger.exception("Warm-up task %s failed", name)
+            result = "failed"
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.tasks[name] = result
+            finished = all(state in ("done", "failed") for state in self.tasks.values())
+        if finished:
+            self._finish(generation)
+
+    def _finish(self, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation or self.state != "warming":
+                return
+            self.state = "warm"
+            self.warmed = self.version
+            self.seconds = round(time.monotonic() - self.started, 3)
+            failed = sum(state == "failed" for state in self.tasks.values())
+        logger.info("Warmed up %s in %.1fs (%d tasks, %d failed)",
+                    self.version, self.seconds, len(self.tasks), failed)
+
+    def _fail(self, generation: int, exc: Exception) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.state = "failed"
+            self.error = f"{type(exc).__name__}: {exc}"
+
+    def status(self) -> dict:
+        with self._lock:
+            counts = {}
+            for state in self.tasks.values():
+                counts[state] = counts.get(state, 0) + 1
+            return {
+                "ready": self.warmed is not None,
+                "state": self.state,
+                "version": None if self.version is None else repr(self.version),
+                "warmed": None if self.warmed is None else repr(self.warmed),
+                "tasks": counts,
+                "failed": sorted(name for name, state in self.tasks.items() if state == "failed"),
+                "seconds": self.seconds,
+                "error": self.error,
+            }